@@ -1,6 +1,31 @@
 import streamlit as st
+from datetime import datetime
+from common.chapter_report import (checked_exercises, request_chapter, requested_chapter,
+                                   student_name, withdraw_chapter)
+from common.warmup import start_warm_up
+
+# Fill the shared caches in the background while the first students log in.
+start_warm_up()
 
 st.markdown("### ❄️ Phonetics Chapter 1 exercises")
 st.write("Exercises A, B-C, D, E, F, K, L")
 st.markdown("#### To get a pdf report, make sure you write your name in English.")
 st.caption("2025. 9. 22")
+
+# --- One report for the whole chapter ---
+st.divider()
+st.markdown("#### 📚 Chapter 1 report")
+checked = checked_exercises()
+st.write("Checked so far: " + (", ".join(checked) if checked else "none yet — check an exercise first."))
+
+name = st.text_input("Your name for the report:", value=student_name())
+if checked and name:
+    if st.button("📄 Build my Chapter 1 report"):
+        request_chapter(name)
+    # Sections were rendered when each exercise was checked; only changes render now
+    pdf_bytes = requested_chapter(name)
+    if pdf_bytes is not None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        filename = f"Chapter1_Report_{name.replace(' ', '_')}_{timestamp}.pdf"
+        if st.download_button("⬇️ Download PDF", data=pdf_bytes, file_name=filename, mime="application/pdf"):
+            withdraw_chapter()
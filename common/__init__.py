@@ -0,0 +1 @@
+"""Shared helpers for the Chapter 1 exercise pages."""
@@ -0,0 +1,57 @@
+"""Autosave of in-progress answers, keyed by student name and exercise.
+
+A reloaded tab or a dropped websocket starts a fresh session, and with it an
+empty page. Pages call ``save_draft`` on every change; the draft goes to the
+submission store's writer (``common.store``), which keeps only the latest
+answers per student and exercise and writes them once typing has paused for
+``PHONETICS_AUTOSAVE_DELAY`` seconds (default 2). A burst of keystrokes is
+one row write. When a student types their name on a blank page,
+``offer_resume`` shows the saved draft and restores it on request.
+
+Drafts live in a ``drafts`` table of the ``PHONETICS_DB`` database; without
+it, autosave is off.
+"""
+import time
+
+import streamlit as st
+
+from common.store import get_store
+
+
+def student_key(name: str) -> str:
+    return " ".join((name or "").split()).casefold()
+
+
+def save_draft(exercise: str, name: str, answers):
+    """Remember in-progress answers; cheap enough to call on every rerun."""
+    store = get_store()
+    if store is not None and student_key(name):
+        store.save_draft(student_key(name), exercise, answers)
+
+
+def discard_draft(exercise: str, name: str):
+    """Forget the draft once the exercise is exported and reset."""
+    store = get_store()
+    if store is not None and student_key(name):
+        store.discard_draft(student_key(name), exercise)
+
+
+def offer_resume(exercise: str, name: str, restore):
+    """On a blank page, offer the student's saved draft.
+
+    ``restore(answers)`` puts the draft back into the page state (and clears
+    the widget keys that would otherwise keep their blank values); the page
+    then reruns. Only call while the page has no answers yet, so a draft is
+    never offered over work in progress.
+    """
+    store = get_store()
+    if store is None or not student_key(name):
+        return
+    draft = store.load_draft(student_key(name), exercise)
+    if draft is None:
+        return
+    saved_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(draft[0]))
+    st.info(f"💾 You have unfinished answers for this exercise from {saved_at}.")
+    if st.button("↩️ Resume my answers", key=f"resume_{exercise}"):
+        restore(draft[1])
+        st.rerun()
@@ -0,0 +1,183 @@
+"""Fixed-layout PDF renderer drawing straight onto a ReportLab canvas.
+
+Every Chapter 1 report is a title, two header lines and then either one table
+or a list of short text blocks, so the layout can be computed directly
+instead of going through platypus flowables (markup parsing, ``wrap``/``split``
+passes, table style resolution). ``render_canvas_report`` takes the same
+arguments as ``common.report.render_report`` and mirrors its look: A4 with
+1-inch margins, the sample stylesheet's Title/Normal sizes and the shared
+table colours, with wrong cells shaded black.
+"""
+from functools import lru_cache
+from io import BytesIO
+
+from common.instrument import timed
+from common.lazy import lazy_import
+from common.report import report_timestamp
+from reportlab.lib.pagesizes import A4  # plain constants, cheap to import
+
+colors = lazy_import("reportlab.lib.colors")
+pdfcanvas = lazy_import("reportlab.pdfgen.canvas")
+pdfmetrics = lazy_import("reportlab.pdfbase.pdfmetrics")
+rl_utils = lazy_import("reportlab.lib.utils")
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 72
+FRAME_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+FONT, BOLD = "Helvetica", "Helvetica-Bold"
+TITLE_SIZE, TITLE_LEADING, TITLE_SPACE_AFTER = 18, 22, 6
+BODY_SIZE, BODY_LEADING = 10, 12
+PAD_X, PAD_Y = 6, 3
+ROW_HEIGHT = BODY_LEADING + 2 * PAD_Y
+GAP_HEADER, GAP_BLOCK = 12, 6
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value)
+
+
+@lru_cache(maxsize=4096)
+def _width(text: str, font: str) -> float:
+    # Cell texts repeat across reports (words, options, "Correct"), so the
+    # per-glyph metric lookup is paid once per distinct string.
+    return pdfmetrics.stringWidth(text, font, BODY_SIZE)
+
+
+def column_widths(header, rows) -> list:
+    """Natural width of each column: widest cell plus padding, as platypus sizes it."""
+    widths = [_width(_text(h), BOLD) for h in header]
+    for row in rows:
+        for c, value in enumerate(row):
+            widths[c] = max(widths[c], _width(_text(value), FONT))
+    return [w + 2 * PAD_X for w in widths]
+
+
+class _Page:
+    """Canvas plus a cursor that moves down the frame, breaking pages as needed."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.y = PAGE_HEIGHT - MARGIN
+        self.text = None
+
+    def fits(self, height: float) -> bool:
+        return self.y - height >= MARGIN
+
+    def flush(self):
+        """Draw the pending text lines (kept in one text object per page)."""
+        if self.text is not None:
+            self.canvas.drawText(self.text)
+            self.text = None
+
+    def break_page(self):
+        self.flush()
+        self.canvas.showPage()
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def line(self, text: str, font=FONT, size=BODY_SIZE, leading=BODY_LEADING, centered=False):
+        width = pdfmetrics.stringWidth(text, font, size)
+        # Only lines wider than the frame pay for word-by-word wrapping.
+        parts = [text] if width <= FRAME_WIDTH else rl_utils.simpleSplit(text, font, size, FRAME_WIDTH)
+        for part in parts or [""]:
+            if not self.fits(leading):
+                self.break_page()
+            if self.text is None:
+                self.text = self.canvas.beginText()
+            if len(parts) > 1:
+                width = pdfmetrics.stringWidth(part, font, size)
+            x = (PAGE_WIDTH - width) / 2 if centered else MARGIN
+            self.text.setFont(font, size)
+            self.text.setTextOrigin(x, self.y - size)
+            self.text.textOut(part)
+            self.y -= leading
+
+    def gap(self, height: float):
+        self.y -= height
+
+    def table(self, header, rows, correct=None):
+        """Table with a repeated header row; ``correct[r][c] is False`` shades a cell."""
+        widths = column_widths(header, rows)
+        lefts = [MARGIN + (FRAME_WIDTH - sum(widths)) / 2]
+        for width in widths:
+            lefts.append(lefts[-1] + width)
+        wrong = [[ok is False for ok in row_ok] for row_ok in (correct or ())]
+
+        start = 0
+        while True:
+            # Rows that fit on this page below the header row.
+            fit = max(1, int((self.y - MARGIN) // ROW_HEIGHT) - 1)
+            page_rows = rows[start:start + fit]
+            self._table_part(lefts, header, page_rows, wrong[start:start + fit])
+            start += fit
+            if start >= len(rows):
+                break
+            self.break_page()
+
+    def _table_part(self, lefts, header, rows, wrong):
+        self.flush()
+        canvas = self.canvas
+        top = self.y
+        bottom = top - ROW_HEIGHT * (len(rows) + 1)
+
+        # Fills first: the header band, then black wrong cells.
+        canvas.setFillColor(colors.lightblue)
+        canvas.rect(lefts[0], top - ROW_HEIGHT, lefts[-1] - lefts[0], ROW_HEIGHT, stroke=0, fill=1)
+        canvas.setFillColor(colors.black)
+        for r, row_wrong in enumerate(wrong, start=1):
+            for c, is_wrong in enumerate(row_wrong):
+                if is_wrong:
+                    canvas.rect(lefts[c], top - ROW_HEIGHT * (r + 1), lefts[c + 1] - lefts[c],
+                                ROW_HEIGHT, stroke=0, fill=1)
+
+        # One grid for the whole block instead of a rectangle per cell.
+        canvas.setStrokeColor(colors.grey)
+        canvas.setLineWidth(0.5)
+        canvas.grid(lefts, [top - ROW_HEIGHT * r for r in range(len(rows) + 2)])
+
+        # All cell text in a single text object.
+        text = canvas.beginText()
+        centers = [(a + b) / 2 for a, b in zip(lefts, lefts[1:])]
+        offset = PAD_Y + BODY_LEADING - BODY_SIZE
+        for r, (font, cells) in enumerate([(BOLD, header)] + [(FONT, row) for row in rows]):
+            baseline = top - ROW_HEIGHT * (r + 1) + offset
+            text.setFont(font, BODY_SIZE)
+            row_wrong = wrong[r - 1] if 0 < r <= len(wrong) else ()
+            for c, (center, value) in enumerate(zip(centers, cells)):
+                value = _text(value)
+                light = c < len(row_wrong) and row_wrong[c]
+                if light:
+                    text.setFillColor(colors.white)
+                text.setTextOrigin(center - _width(value, font) / 2, baseline)
+                text.textOut(value)
+                if light:
+                    text.setFillColor(colors.black)
+        canvas.drawText(text)
+        self.y = bottom
+
+
+@timed("pdf")
+def render_canvas_report(title: str, name: str, header=None, rows=(), correct=None,
+                         paragraphs=(), timestamp: str = None) -> bytes:
+    """Same arguments and output as ``common.report.render_report``, drawn directly."""
+    buffer = BytesIO()
+    canvas = pdfcanvas.Canvas(buffer, pagesize=A4)
+    page = _Page(canvas)
+
+    page.line(title, font=BOLD, size=TITLE_SIZE, leading=TITLE_LEADING, centered=True)
+    page.gap(TITLE_SPACE_AFTER + GAP_HEADER)
+    page.line(f"Name: {name}")
+    page.line(f"Timestamp: {timestamp or report_timestamp()}")
+    page.gap(GAP_HEADER)
+
+    if header is not None:
+        page.table(list(header), [list(r) for r in rows], correct)
+
+    for block in paragraphs:
+        for line in block:
+            page.line(line)
+        page.gap(GAP_BLOCK)
+
+    page.flush()
+    canvas.save()
+    return buffer.getvalue()
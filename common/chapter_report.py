@@ -0,0 +1,152 @@
+"""One "Chapter 1 report" per student, joined from per-exercise sections.
+
+When a page checks an exercise, ``record_section`` remembers the answers and
+the minute they were checked, and queues that exercise's report as a section
+(``common.pdf_jobs``) under the student's name once one is known. Exporting the chapter asks the queue for the same
+sections again: unchanged ones come straight from the shared report cache,
+only changed ones are rendered, and pypdf joins them behind a one-page cover
+with every exercise's score. The joined file is cached on the section keys
+too, so exporting twice without changes costs nothing.
+
+The session keeps only the answers per exercise (under its own key, outside
+the evicted ``ex:`` namespaces), never PDF bytes.
+"""
+import copy
+import hashlib
+from io import BytesIO
+
+import streamlit as st
+
+from common.exercise_reports import report_engine
+from common.exercises import EXERCISE_IDS, TITLES
+from common.grading import score
+from common.pdf_cache import CACHE, report_key
+from common.pdf_jobs import QUEUE, report_failed, wait_for
+from common.report import report_timestamp
+
+SESSION_KEY = "chapter1"
+EXPORT_KEY = "chapter1_export"
+
+
+def _chapter() -> dict:
+    return st.session_state.setdefault(SESSION_KEY, {"name": "", "sections": {}})
+
+
+def student_name() -> str:
+    """Last name entered on any exercise page this session."""
+    return _chapter()["name"]
+
+
+def record_section(exercise: str, name: str, answers, render: bool = True):
+    """Remember the checked answers and start rendering their section.
+
+    Safe to call on every rerun: unchanged answers keep their section.
+    Sections are rendered under the student's name, so nothing is queued
+    until a name is known (Exercise A has no name field); once it is, or
+    when it changes, every recorded section is queued under it. With
+    ``render=False`` (Exercise D, recorded as the student types) the answers
+    are only stored and their section renders when the chapter is built.
+    """
+    chapter = _chapter()
+    deferred = chapter.setdefault("deferred", set())
+    renamed = bool(name) and name != chapter["name"]
+    if renamed:
+        chapter["name"] = name
+    saved = chapter["sections"].get(exercise)
+    if saved is None or saved[0] != answers:
+        chapter["sections"][exercise] = (copy.deepcopy(answers), report_timestamp())
+    elif not renamed:
+        return
+    (deferred.discard if render else deferred.add)(exercise)
+    if not chapter["name"]:
+        return
+    for ex in checked_exercises() if renamed else [exercise]:
+        if ex not in deferred:
+            answers, checked_at = chapter["sections"][ex]
+            QUEUE.submit(ex, chapter["name"], answers, timestamp=checked_at)
+
+
+def checked_exercises() -> list:
+    sections = _chapter()["sections"]
+    return [ex for ex in EXERCISE_IDS if ex in sections]
+
+
+def render_cover(name: str, sections: dict, timestamp: str) -> bytes:
+    rows = []
+    for ex in EXERCISE_IDS:
+        if ex in sections:
+            answers, checked_at = sections[ex]
+            correct, total = score(ex, answers)
+            rows.append([ex, TITLES[ex], f"{correct} / {total}", checked_at])
+        else:
+            rows.append([ex, TITLES[ex], "-", "not checked"])
+    return report_engine("chapter")("Chapter 1 Report", name,
+                                     header=["Exercise", "Title", "Score", "Checked"],
+                                     rows=rows, timestamp=timestamp)
+
+
+def merge_pdfs(parts) -> bytes:
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for data in parts:
+        writer.append(BytesIO(data))
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def chapter_report(name: str):
+    """The joined chapter PDF once every section is ready, else ``None``.
+
+    Call on every rerun while the export is wanted; pending sections show a
+    progress note that reruns the page when they are done. A section or
+    cover that fails to render shows an error with a retry button instead.
+    """
+    sections = _chapter()["sections"]
+    jobs = [QUEUE.submit(ex, name, answers, timestamp=checked_at)
+            for ex, (answers, checked_at) in ((ex, sections[ex]) for ex in checked_exercises())]
+    pending = [job for job in jobs if not job.done()]
+    if pending:
+        wait_for(pending[0].key)
+        return None
+    failed = [job for job in jobs if job.future.exception() is not None]
+    for job in failed:
+        QUEUE.forget(job.key)
+
+    timestamp = report_timestamp()
+    key = hashlib.sha256(
+        "\n".join(["chapter1", name, timestamp, *(job.key for job in jobs)]).encode("utf-8")
+    ).hexdigest()
+    try:
+        if failed:
+            raise failed[0].future.exception()
+        return CACHE.get_or_render(key, lambda: merge_pdfs(
+            [render_cover(name, sections, timestamp), *(job.result() for job in jobs)]))
+    except Exception:
+        report_failed("chapter")
+        return None
+
+
+def _request_key(name: str) -> str:
+    return report_key("chapter", name, sorted(_chapter()["sections"].items()), "")
+
+
+def request_chapter(name: str):
+    """Remember that the chapter was asked for with the current sections."""
+    st.session_state[EXPORT_KEY] = _request_key(name)
+
+
+def withdraw_chapter():
+    """Forget the request once the chapter has been downloaded."""
+    st.session_state.pop(EXPORT_KEY, None)
+
+
+def requested_chapter(name: str):
+    """``chapter_report`` while name and sections are those last requested.
+
+    Checking another exercise (or changing the name) withdraws the request,
+    so visiting the home page does not rebuild the chapter every time.
+    """
+    if st.session_state.get(EXPORT_KEY) != _request_key(name):
+        return None
+    return chapter_report(name)
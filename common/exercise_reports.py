@@ -0,0 +1,156 @@
+"""Per-exercise PDF reports.
+
+Each ``render_*`` function takes the student's name and answers in the same
+shape the page keeps them in (see below) and returns PDF bytes.  They do not
+touch Streamlit, so the pages and the batch tools share them.
+
+Reports are drawn by one of two engines with identical text: "canvas"
+(``common.canvas_report``, fixed layout) or "platypus" (``common.report``,
+flowables).  Canvas is the default for Exercise E, whose long paragraph
+report it renders about 2.7x faster; the table reports gain less than 2x and
+default to platypus.  ``PHONETICS_PDF_ENGINE`` picks the engine, either for
+every exercise (``canvas``) or per exercise (``platypus,K=canvas``);
+renderers also take ``engine=`` to override both.
+
+    A   ``{item number: typed label}`` (string keys are accepted too)
+    BC  list of rows, each ``[voicing, place, centrality, oral/nasal, manner]``
+    D   ``{letter: {"place": ..., "manner": ..., "example": ...}}``
+    E   list of selected words per question
+    F   ``{word: [voicing, place, manner]}`` (the "adder" example may be omitted)
+    K   ``{word: number of sounds}``
+    L   ``{question: selected word}``
+"""
+import os
+
+from common.canvas_report import render_canvas_report
+from common.exercises import (
+    A_TOTAL_ITEMS, BC_SYMBOLS, BC_COLUMNS, D_LETTERS, E_QUESTIONS, F_WORDS, K_WORDS, L_QUESTIONS,
+)
+from common.grading import (
+    F_COLUMNS, bc_frame, e_feedback, f_answer, grade_a, grade_bc_frame, grade_f_cells, grade_k,
+    grade_l,
+)
+from common.report import render_report
+
+ENGINES = {"canvas": render_canvas_report, "platypus": render_report}
+DEFAULT_ENGINE = "platypus"
+DEFAULT_ENGINES = {"E": "canvas"}
+
+
+def _engine_settings(spec: str) -> dict:
+    """``"platypus,E=canvas"`` -> ``{None: "platypus", "E": "canvas"}``."""
+    settings = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        exercise, _, engine = part.rpartition("=")
+        if engine not in ENGINES:
+            raise ValueError(f"PHONETICS_PDF_ENGINE: unknown engine {engine!r}")
+        settings[exercise or None] = engine
+    return settings
+
+
+ENGINE_SETTINGS = _engine_settings(os.environ.get("PHONETICS_PDF_ENGINE", ""))
+
+
+def report_engine(exercise: str, engine: str = None):
+    """Render function for ``exercise``: ``engine`` if given, else the configured one."""
+    if engine is None:
+        engine = ENGINE_SETTINGS.get(exercise) or ENGINE_SETTINGS.get(None) \
+            or DEFAULT_ENGINES.get(exercise, DEFAULT_ENGINE)
+    return ENGINES[engine]
+
+
+def render_a(name, answers, timestamp=None, engine=None):
+    """Wrong labels are shaded black, as in Exercises K and L."""
+    rows, correct = [], []
+    for n, ok in zip(range(1, A_TOTAL_ITEMS + 1), grade_a(answers)):
+        typed = answers.get(n, answers.get(str(n), "")) or "-"
+        rows.append([n, typed, "Correct" if ok else "Incorrect"])
+        correct.append([None, ok, None])
+    return report_engine("A", engine)("Chapter 1 – Exercise A Report", name,
+                                      header=["Item", "Your answer", "Result"],
+                                      rows=rows, correct=correct, timestamp=timestamp)
+
+
+def render_bc(name, rows, timestamp=None, engine=None):
+    """Incorrect cells are shaded black, as in Exercise F."""
+    frame = bc_frame(rows)
+    wrong = grade_bc_frame(frame).to_numpy()
+    body = [[symbol] + row for symbol, row in zip(BC_SYMBOLS, frame.values.tolist())]
+    correct = [[None] + [not w for w in row] for row in wrong.tolist()]
+    return report_engine("BC", engine)("Chapter 1 – Exercise C Report", name,
+                                       header=["Symbol", *BC_COLUMNS], rows=body, correct=correct,
+                                       timestamp=timestamp)
+
+
+def render_d(name, responses, timestamp=None, engine=None):
+    rows = []
+    for k in D_LETTERS:
+        ans = responses.get(k, {"place": "", "manner": "", "example": ""})
+        rows.append([k, ans["place"], ans["manner"], ans["example"]])
+    return report_engine("D", engine)(
+        "Chapter 1 – Exercise D Report", name,
+        header=["Diagram", "Place of Articulation", "Manner of Articulation", "Example Word"],
+        rows=rows,
+        timestamp=timestamp,
+    )
+
+
+def render_e(name, responses, timestamp=None, engine=None):
+    blocks = []
+    feedback = e_feedback(responses)
+    for i, (question, selected, feedback_text) in enumerate(zip(E_QUESTIONS, responses, feedback)):
+        qtext = f"{i+1}. {question[0]}"
+        selected_text = ", ".join(selected) if selected else "(No selection)"
+        blocks.append([qtext, f"Selected: {selected_text}", f"Result: {feedback_text}"])
+
+    return report_engine("E", engine)("Chapter 1 – Exercise E Report", name, paragraphs=blocks,
+                                      timestamp=timestamp)
+
+
+def render_f(name, answers, timestamp=None, engine=None):
+    """Any cell (Voicing/Place/Manner) that is incorrect is shaded black."""
+    rows, correct = [], []
+    for w, cells in zip(F_WORDS, grade_f_cells(answers)):
+        rows.append([w, *f_answer(answers, w)])
+        correct.append([None, *cells])
+    return report_engine("F", engine)("Chapter 1 – Exercise F Report", name,
+                                      header=["Word", *F_COLUMNS],
+                                      rows=rows, correct=correct, timestamp=timestamp)
+
+
+def render_k(name, responses, timestamp=None, engine=None):
+    rows, correct = [], []
+    for w, ok in zip(K_WORDS, grade_k(responses)):
+        selected = responses.get(w, "-")
+        rows.append([w, selected, "Correct" if ok else "Incorrect"])
+        correct.append([None, ok, None])
+    return report_engine("K", engine)("Chapter 1 – Exercise K Report", name,
+                                      header=["Word", "Selected", "Result"],
+                                      rows=rows, correct=correct, timestamp=timestamp)
+
+
+def render_l(name, responses, timestamp=None, engine=None):
+    rows, correct = [], []
+    for q, ok in zip(L_QUESTIONS, grade_l(responses)):
+        selected = responses.get(q, "-")
+        rows.append([q, selected, "Correct" if ok else "Incorrect"])
+        correct.append([None, ok, None])
+    return report_engine("L", engine)("Chapter 1 – Exercise L Report", name,
+                                      header=["Question", "Selected", "Result"],
+                                      rows=rows, correct=correct, timestamp=timestamp)
+
+
+RENDERERS = {
+    "A": render_a,
+    "BC": render_bc,
+    "D": render_d,
+    "E": render_e,
+    "F": render_f,
+    "K": render_k,
+    "L": render_l,
+}
+
+
+def render(exercise: str, name: str, answers, timestamp=None, engine=None) -> bytes:
+    """Report for any exercise by id (a picklable entry point for worker processes)."""
+    return RENDERERS[exercise](name, answers, timestamp=timestamp, engine=engine)
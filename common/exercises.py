@@ -0,0 +1,258 @@
+"""Exercise definitions for Chapter 1, compiled once per process.
+
+The answer keys and options live in ``data/chapter1.json``.  On import the
+file is validated and compiled into read-only lookups (tuples, frozensets and
+mapping proxies) that the pages, report rendering and batch tools share.  A
+bad key raises ``ExerciseDefinitionError`` at import time rather than when a
+student presses "Check".
+
+Exercises B-C and F describe consonants, so their keys are not spelled out:
+each item names a segment of the shared ``consonants`` table, where every
+segment is one integer code per feature (voicing, place, centrality,
+nasality, manner).  An exercise's answer labels compile to bitsets of the
+feature values they name ("liquid" is lateral or approximant), so a label is
+right when its bitset contains the segment's code.
+"""
+import json
+from pathlib import Path
+from types import MappingProxyType
+
+from common.normalize import normalize, normalize_cell
+
+DEFINITIONS_PATH = Path(__file__).resolve().parent.parent / "data" / "chapter1.json"
+
+
+class ExerciseDefinitionError(ValueError):
+    """Raised when data/chapter1.json is inconsistent."""
+
+
+def _require(cond, msg):
+    if not cond:
+        raise ExerciseDefinitionError(msg)
+
+
+def _frozen(mapping):
+    return MappingProxyType(dict(mapping))
+
+
+def _index(options):
+    _require(len(set(options)) == len(options), f"duplicate options in {list(options)}")
+    return _frozen({opt: i for i, opt in enumerate(options)})
+
+
+def _compile_a(spec, compiled):
+    items = spec["items"]
+    numbers = [it["number"] for it in items]
+    _require(numbers == list(range(1, len(items) + 1)), "A: items must be numbered 1..N in order")
+    key = {}
+    accepted = {}
+    for it in items:
+        _require(it["accept"], f"A: item {it['number']} has no accepted answers")
+        key[it["number"]] = tuple(it["accept"])
+        accepted[it["number"]] = frozenset(normalize(x) for x in it["accept"])
+    return {"A_TOTAL_ITEMS": len(items), "A_ANSWER_KEY": _frozen(key), "A_ACCEPTED": _frozen(accepted)}
+
+
+def _compile_consonants(spec):
+    values = {f: tuple(v) for f, v in spec["features"].items()}
+    index = {f: _index(v) for f, v in values.items()}
+    codes = {}
+    for segment, described in spec["segments"].items():
+        _require(len(described) == len(values), f"consonants: [{segment}] needs {len(values)} features")
+        for f, v in zip(values, described):
+            _require(v in index[f], f"consonants: [{segment}] {f} {v!r} is not a {f} value")
+        codes[segment] = tuple(index[f][v] for f, v in zip(values, described))
+    return {
+        "CONSONANT_FEATURES": tuple(values),
+        "FEATURE_VALUES": _frozen(values),
+        "SEGMENTS": tuple(codes),
+        "SEGMENT_CODES": _frozen(codes),
+    }
+
+
+def _feature_labels(ex, spec, compiled):
+    """``(features, [{label: bitset of value codes}] per feature)`` in display order.
+
+    Features without a ``labels`` entry accept exactly their value names.
+    """
+    values = compiled["FEATURE_VALUES"]
+    features = tuple(spec["features"])
+    labels = []
+    for f in features:
+        _require(f in values, f"{ex}: unknown feature {f!r}")
+        index = {v: i for i, v in enumerate(values[f])}
+        named = spec.get("labels", {}).get(f) or {v: [v] for v in values[f]}
+        masks = {}
+        for label, names in named.items():
+            unknown = [n for n in names if n not in index]
+            _require(names and not unknown, f"{ex}: {f} label {label!r} names unknown values {unknown}")
+            masks[label] = sum(1 << index[n] for n in set(names))
+        labels.append(masks)
+    return features, labels
+
+
+def _key_labels(ex, segment, features, labels, compiled):
+    """The display label of each feature of ``segment``: the first label naming its value."""
+    _require(segment in compiled["SEGMENT_CODES"], f"{ex}: [{segment}] is not in the consonant table")
+    codes = compiled["SEGMENT_CODES"][segment]
+    key = []
+    for f, masks in zip(features, labels):
+        code = codes[compiled["CONSONANT_FEATURES"].index(f)]
+        label = next((label for label, mask in masks.items() if mask >> code & 1), None)
+        _require(label is not None, f"{ex}: no {f} label for [{segment}]")
+        key.append(label)
+    return tuple(key)
+
+
+def _grading_masks(labels):
+    return tuple(_frozen({normalize_cell(label): mask for label, mask in masks.items()})
+                 for masks in labels)
+
+
+def _compile_bc(spec, compiled):
+    segments, columns = tuple(spec["segments"]), tuple(spec["columns"])
+    features, labels = _feature_labels("BC", spec, compiled)
+    _require(len(features) == len(columns), f"BC: {len(columns)} columns need as many features")
+    answers = [_key_labels("BC", s, features, labels, compiled) for s in segments]
+    return {
+        "BC_SYMBOLS": tuple(f"[{s}]" for s in segments),
+        "BC_SEGMENTS": segments,
+        "BC_COLUMNS": columns,
+        "BC_FEATURES": features,
+        "BC_LABEL_MASKS": _grading_masks(labels),
+        # Row dicts keyed "1".."5", as the page has always read them.
+        "BC_ANSWER_KEY": tuple(_frozen({str(c): v for c, v in enumerate(row, start=1)}) for row in answers),
+    }
+
+
+def _compile_d(spec, compiled):
+    return {"D_LETTERS": tuple(spec["letters"]), "D_FIELDS": tuple(spec["fields"])}
+
+
+def _compile_e(spec, compiled):
+    questions, options, option_index, correct = [], [], [], []
+    for i, q in enumerate(spec["questions"], start=1):
+        index = _index(q["options"])
+        missing = [w for w in q["answers"] if w not in index]
+        _require(not missing, f"E: question {i} answers {missing} are not among its options")
+        questions.append((q["prompt"], tuple(q["answers"])))
+        options.append(tuple(q["options"]))
+        option_index.append(index)
+        correct.append(sum(1 << index[w] for w in set(q["answers"])))
+    return {
+        "E_QUESTIONS": tuple(questions),
+        "E_OPTIONS": tuple(options),
+        "E_OPTION_INDEX": tuple(option_index),
+        "E_CORRECT_MASKS": tuple(correct),
+    }
+
+
+def _compile_f(spec, compiled):
+    features, labels = _feature_labels("F", spec, compiled)
+    _require(features == ("voicing", "place", "manner"), "F: features must be voicing, place, manner")
+    opts = {c: tuple(masks) for c, masks in zip(features, labels)}
+    key, segments = {}, {}
+    for it in spec["items"]:
+        answer = _key_labels("F", it["segment"], features, labels, compiled)
+        key[it["word"]] = answer
+        segments[it["word"]] = it["segment"]
+    words = tuple(key)
+    _require(words[0] == spec["example"], "F: the example word must be the first item")
+    return {
+        "F_WORDS": words,
+        "F_EXAMPLE": spec["example"],
+        "F_SEGMENTS": _frozen(segments),
+        "F_FEATURES": features,
+        "F_LABEL_MASKS": _grading_masks(labels),
+        "F_ANSWER_KEY": _frozen(key),
+        "F_VOICING_OPTIONS": opts["voicing"],
+        "F_PLACE_OPTIONS": opts["place"],
+        "F_MANNER_OPTIONS": opts["manner"],
+    }
+
+
+def _compile_k(spec, compiled):
+    options = tuple(spec["options"])
+    index = _index(options)
+    key = {}
+    for it in spec["items"]:
+        _require(it["answer"] in index, f"K: {it['word']} answer {it['answer']} is not an option")
+        key[it["word"]] = it["answer"]
+    return {"K_WORDS": tuple(key), "K_ANSWER_KEY": _frozen(key), "K_OPTIONS": options}
+
+
+def _compile_l(spec, compiled):
+    questions, options = {}, {}
+    for i, it in enumerate(spec["items"], start=1):
+        index = _index(it["options"])
+        _require(it["answer"] in index, f"L: set {i} answer {it['answer']!r} is not an option")
+        label = f"{i}. " + " / ".join(it["options"])
+        questions[label] = it["answer"]
+        options[label] = tuple(it["options"])
+    return {"L_QUESTIONS": _frozen(questions), "L_OPTIONS": _frozen(options)}
+
+
+_COMPILERS = {
+    "A": _compile_a, "BC": _compile_bc, "D": _compile_d, "E": _compile_e,
+    "F": _compile_f, "K": _compile_k, "L": _compile_l,
+}
+
+EXERCISE_IDS = tuple(_COMPILERS)
+
+
+def load_exercises(path=DEFINITIONS_PATH) -> dict:
+    """Validate and compile an exercise definition file into constants."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    missing = [ex for ex in _COMPILERS if ex not in spec]
+    _require(not missing, f"{path}: missing exercises {missing}")
+    try:
+        compiled = _compile_consonants(spec["consonants"])
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ExerciseDefinitionError(f"{path}: malformed consonant table: {e!r}") from e
+    for ex, compile_one in _COMPILERS.items():
+        try:
+            # B-C and F look their keys up in the consonant table compiled above.
+            compiled.update(compile_one(spec[ex], compiled))
+        except (KeyError, TypeError) as e:
+            raise ExerciseDefinitionError(f"{path}: malformed exercise {ex}: {e!r}") from e
+    compiled["TITLES"] = _frozen({ex: spec[ex]["title"] for ex in _COMPILERS})
+    return compiled
+
+
+_compiled = load_exercises()
+
+A_TOTAL_ITEMS = _compiled["A_TOTAL_ITEMS"]
+A_ANSWER_KEY = _compiled["A_ANSWER_KEY"]
+A_ACCEPTED = _compiled["A_ACCEPTED"]
+CONSONANT_FEATURES = _compiled["CONSONANT_FEATURES"]
+FEATURE_VALUES = _compiled["FEATURE_VALUES"]
+SEGMENTS = _compiled["SEGMENTS"]
+SEGMENT_CODES = _compiled["SEGMENT_CODES"]
+BC_SYMBOLS = _compiled["BC_SYMBOLS"]
+BC_SEGMENTS = _compiled["BC_SEGMENTS"]
+BC_COLUMNS = _compiled["BC_COLUMNS"]
+BC_FEATURES = _compiled["BC_FEATURES"]
+BC_LABEL_MASKS = _compiled["BC_LABEL_MASKS"]
+BC_ANSWER_KEY = _compiled["BC_ANSWER_KEY"]
+D_LETTERS = _compiled["D_LETTERS"]
+D_FIELDS = _compiled["D_FIELDS"]
+E_QUESTIONS = _compiled["E_QUESTIONS"]
+E_OPTIONS = _compiled["E_OPTIONS"]
+E_OPTION_INDEX = _compiled["E_OPTION_INDEX"]
+E_CORRECT_MASKS = _compiled["E_CORRECT_MASKS"]
+F_WORDS = _compiled["F_WORDS"]
+F_EXAMPLE = _compiled["F_EXAMPLE"]
+F_SEGMENTS = _compiled["F_SEGMENTS"]
+F_FEATURES = _compiled["F_FEATURES"]
+F_LABEL_MASKS = _compiled["F_LABEL_MASKS"]
+F_ANSWER_KEY = _compiled["F_ANSWER_KEY"]
+F_VOICING_OPTIONS = _compiled["F_VOICING_OPTIONS"]
+F_PLACE_OPTIONS = _compiled["F_PLACE_OPTIONS"]
+F_MANNER_OPTIONS = _compiled["F_MANNER_OPTIONS"]
+K_WORDS = _compiled["K_WORDS"]
+K_ANSWER_KEY = _compiled["K_ANSWER_KEY"]
+K_OPTIONS = _compiled["K_OPTIONS"]
+L_QUESTIONS = _compiled["L_QUESTIONS"]
+L_OPTIONS = _compiled["L_OPTIONS"]
+TITLES = _compiled["TITLES"]
@@ -0,0 +1,407 @@
+"""Grading for every Chapter 1 exercise, usable without Streamlit.
+
+Answers use the same shapes as the pages and reports (see
+common/exercise_reports.py; Exercise A is ``{item number: typed text}``).
+``grade(exercise, answers)`` returns one bool per scored item, in the order
+of ``item_labels(exercise)``.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+from common.exercises import (
+    A_ACCEPTED, A_TOTAL_ITEMS, BC_COLUMNS, BC_FEATURES, BC_LABEL_MASKS, BC_SEGMENTS, BC_SYMBOLS,
+    CONSONANT_FEATURES, D_FIELDS, D_LETTERS, E_CORRECT_MASKS, E_OPTION_INDEX, E_QUESTIONS,
+    F_ANSWER_KEY, F_EXAMPLE, F_FEATURES, F_LABEL_MASKS, F_SEGMENTS, F_WORDS, K_ANSWER_KEY, K_WORDS,
+    L_QUESTIONS, SEGMENT_CODES, SEGMENTS,
+)
+from common.instrument import timed
+from common.lazy import lazy_import
+from common.normalize import normalize, normalize_cell
+
+# Loaded on the first table grading, not when a page imports this module.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# ---------------- Exercise A ----------------
+@timed("grading")
+def a_item_correct(num: int, user_text: str) -> bool:
+    """Typed label for item ``num``; a trailing plural "s" is tolerated."""
+    if not user_text:
+        return False
+    gold = A_ACCEPTED.get(num, frozenset())
+    guess = normalize(user_text)
+    return guess in gold or (guess.endswith("s") and guess[:-1] in gold) or ((guess + "s") in gold)
+
+
+@timed("grading")
+def grade_a(answers) -> list:
+    # JSON round-trips turn the int item numbers into strings.
+    return [a_item_correct(n, answers.get(n, answers.get(str(n), ""))) for n in range(1, A_TOTAL_ITEMS + 1)]
+
+
+# ---------------- Consonant features (B-C and F) ----------------
+# Keys are segments of the shared consonant table; answers are compared
+# feature by feature as bitsets (see common/exercises.py).
+@lru_cache(maxsize=1)
+def segment_codes() -> np.ndarray:
+    """One row per segment of ``SEGMENTS``, one value code per consonant feature."""
+    return np.array([SEGMENT_CODES[s] for s in SEGMENTS], dtype=np.int64)
+
+
+@lru_cache(maxsize=None)
+def _segment_index() -> dict:
+    return {s: i for i, s in enumerate(SEGMENTS)}
+
+
+@lru_cache(maxsize=None)
+def feature_columns(features: tuple) -> np.ndarray:
+    return np.array([CONSONANT_FEATURES.index(f) for f in features])
+
+
+def key_codes(segments, features: tuple) -> np.ndarray:
+    """Expected value codes, one row per segment, one column per feature."""
+    rows = np.array([_segment_index()[s] for s in segments], dtype=np.intp)
+    return segment_codes()[rows][:, feature_columns(features)]
+
+
+def label_masks(cells: pd.DataFrame, masks) -> np.ndarray:
+    """Normalized answer cells as feature bitsets; blank or unknown labels are 0."""
+    return np.column_stack([
+        cells.iloc[:, c].map(m).fillna(0).to_numpy(dtype=np.int64) for c, m in enumerate(masks)
+    ]) if len(cells) else np.zeros((0, len(masks)), dtype=np.int64)
+
+
+def feature_hits(masks: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """True where an answer's bitset contains the expected value."""
+    return (masks >> codes) & 1 == 1
+
+
+def nearest_segments(masks: np.ndarray, features: tuple, expected=None):
+    """``(segments, features matched)`` of the table segment each answer row fits best.
+
+    Every row is compared with the whole table at once. Ties go to the
+    ``expected`` segment of that row when given, then to table order.
+    """
+    table = segment_codes()[:, feature_columns(features)]
+    hits = ((masks[:, None, :] >> table[None, :, :]) & 1).sum(axis=2)
+    if expected is not None:
+        rows = np.array([_segment_index()[s] for s in expected], dtype=np.intp)
+        tie_break = np.zeros_like(hits)
+        tie_break[np.arange(len(rows)), rows] = 1
+        best = (hits * 2 + tie_break).argmax(axis=1)
+    else:
+        best = hits.argmax(axis=1)
+    return [SEGMENTS[i] for i in best], hits[np.arange(len(best)), best]
+
+
+def feature_diagnosis(masks: np.ndarray, features: tuple, segments) -> pd.DataFrame:
+    """Partial credit and nearest segment for answer rows keyed by ``segments``.
+
+    ``credit`` counts the features answered right out of ``features``;
+    ``nearest`` is the segment the answer describes best, and ``exact`` says
+    whether it describes that segment on every feature. Rows are graded in
+    one pass, so a whole class's stacked answers cost one call.
+    """
+    credit = feature_hits(masks, key_codes(segments, features)).sum(axis=1)
+    nearest, matched = nearest_segments(masks, features, segments)
+    return pd.DataFrame({"segment": list(segments), "credit": credit, "of": len(features),
+                         "nearest": nearest, "exact": matched == len(features)})
+
+
+def describe_diagnosis(row) -> str:
+    """One feedback line from a ``feature_diagnosis`` row."""
+    text = f"{row.credit}/{row.of} features"
+    if row.nearest != row.segment and row.credit < row.of:
+        text += f" — {'this describes' if row.exact else 'closest to'} [{row.nearest}]"
+    return text
+
+
+# ---------------- Exercise B-C ----------------
+def normalize_cells(frame: pd.DataFrame) -> pd.DataFrame:
+    """Column-wise version of ``common.normalize.normalize_cell``."""
+    return frame.fillna("").astype(str).apply(
+        lambda col: col.str.lower().str.replace(r"[() ]", "", regex=True).str.strip()
+    )
+
+
+@timed("grading")
+def grade_bc_frame(student_df: pd.DataFrame) -> pd.DataFrame:
+    """Per-cell mismatch mask (True = wrong) for one or many B-C tables.
+
+    Rows are matched to the key by position, so a frame of many students'
+    tables stacked one after another (6 rows each) is graded in one call.
+    The mask has the same index as ``student_df`` and the five answer columns.
+    """
+    masks = bc_masks(student_df)
+    wrong = ~feature_hits(masks, key_codes(bc_segments(len(student_df)), BC_FEATURES))
+    return pd.DataFrame(wrong, index=student_df.index, columns=list(BC_COLUMNS))
+
+
+def bc_masks(student_df: pd.DataFrame) -> np.ndarray:
+    return label_masks(normalize_cells(student_df[list(BC_COLUMNS)]), BC_LABEL_MASKS)
+
+
+def bc_segments(n: int) -> list:
+    """Key segment of each of ``n`` stacked B-C rows."""
+    return [BC_SEGMENTS[i % len(BC_SEGMENTS)] for i in range(n)]
+
+
+def diagnose_bc_frame(student_df: pd.DataFrame) -> pd.DataFrame:
+    """``feature_diagnosis`` for one or many stacked B-C tables."""
+    return feature_diagnosis(bc_masks(student_df), BC_FEATURES, bc_segments(len(student_df)))
+
+
+def _bc_cells(rows) -> list:
+    rows = list(rows)[:len(BC_SYMBOLS)]
+    cells = []
+    for row in rows + [[]] * (len(BC_SYMBOLS) - len(rows)):
+        row = ["" if v is None else str(v) for v in row]
+        cells.append((row + [""] * len(BC_COLUMNS))[:len(BC_COLUMNS)])
+    return cells
+
+
+def bc_frame(rows) -> pd.DataFrame:
+    """B-C answer rows padded/truncated to the table's shape."""
+    return pd.DataFrame(_bc_cells(rows), columns=list(BC_COLUMNS))
+
+
+@timed("grading")
+def grade_bc(rows) -> list:
+    """One item per symbol: correct when all five cells match."""
+    return (~grade_bc_frame(bc_frame(rows)).any(axis=1)).tolist()
+
+
+# ---------------- Exercise D ----------------
+@timed("grading")
+def grade_d(responses) -> list:
+    """Exercise D has no answer key; an item counts once all fields are filled."""
+    return [all(str(responses.get(k, {}).get(f, "")).strip() for f in D_FIELDS) for k in D_LETTERS]
+
+
+# ---------------- Exercise E ----------------
+# Each question's options are bit positions (option j = bit j); a response is
+# the int mask of its ticked options, as the page keeps it.  A word that is
+# not among the options sets the bit just past them, so it always counts as a
+# wrong pick.  Scores come from popcounts of the mask against the key mask.
+def e_mask(i: int, selected) -> int:
+    """Mask of question ``i``'s response (a mask already, or a list of words)."""
+    if isinstance(selected, int):
+        return selected
+    index = E_OPTION_INDEX[i]
+    return sum(1 << index.get(w, len(index)) for w in set(selected))
+
+
+def e_mask_row(responses) -> list:
+    """Masks of one submission; missing questions are blank."""
+    row = [e_mask(i, selected) for i, selected in zip(range(len(E_QUESTIONS)), responses)]
+    return row + [0] * (len(E_QUESTIONS) - len(row))
+
+
+def e_masks(many) -> np.ndarray:
+    """``(submissions, questions)`` array of masks, for ``score_e``."""
+    rows = [e_mask_row(responses) for responses in many]
+    return np.array(rows, dtype=np.int64).reshape(len(rows), len(E_QUESTIONS))
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):  # NumPy 2
+        return np.bitwise_count(masks).astype(np.int64)
+    counts = np.zeros(masks.shape, dtype=np.int64)
+    while masks.any():
+        counts += masks & 1
+        masks = masks >> 1
+    return counts
+
+
+@timed("grading")
+def score_e(masks: np.ndarray) -> dict:
+    """Per-question scores of a ``(submissions, questions)`` array of masks.
+
+    Returns arrays of the same shape: ``hits`` (correct words ticked),
+    ``picked`` and ``key`` (words ticked and words in the key), ``exact``,
+    and ``precision``, ``recall`` and ``f1`` (0 when nothing is ticked).
+    """
+    masks = np.asarray(masks, dtype=np.int64)
+    key = np.array(E_CORRECT_MASKS, dtype=np.int64)
+    hits = _popcount(masks & key)
+    picked = _popcount(masks)
+    size = np.broadcast_to(_popcount(key), masks.shape)
+
+    def ratio(a, b):
+        return np.divide(a, b, out=np.zeros(masks.shape), where=b > 0)
+
+    return {
+        "hits": hits, "picked": picked, "key": size,
+        "exact": masks == key,
+        "precision": ratio(hits, picked),
+        "recall": ratio(hits, size),
+        "f1": ratio(2 * hits, picked + size),
+    }
+
+
+def grade_e(responses) -> list:
+    return score_e(e_masks([responses]))["exact"][0].tolist()
+
+
+def e_feedback(responses) -> list:
+    """One line per question for the page and the report."""
+    scores = {k: v[0].tolist() for k, v in score_e(e_masks([responses])).items()}
+    lines = []
+    for exact, hits, picked, size, f1 in zip(*(scores[k] for k in ("exact", "hits", "picked", "key", "f1"))):
+        if exact:
+            lines.append("Correct")
+        elif hits:
+            wrong = picked - hits
+            lines.append(f"Partially correct: {hits} of {size} found"
+                         + (f", {wrong} wrong" if wrong else "") + f" (credit {f1:.2f})")
+        else:
+            lines.append("Incorrect")
+    return lines
+
+
+# ---------------- Exercise F ----------------
+F_COLUMNS = ("Voicing", "Place", "Manner")
+
+
+def f_masks(student_df: pd.DataFrame) -> np.ndarray:
+    return label_masks(normalize_cells(student_df[list(F_COLUMNS)]), F_LABEL_MASKS)
+
+
+@timed("grading")
+def grade_f_frame(student_df: pd.DataFrame) -> pd.DataFrame:
+    """Per-cell mismatch mask (True = wrong) for a frame with a ``Word`` column.
+
+    Rows are matched to the key by word, so any subset or order of the
+    F words (e.g. the page's editor without the example row) is graded in
+    one call. Blank cells count as wrong.
+    """
+    segments = [F_SEGMENTS[w] for w in student_df["Word"]]
+    wrong = ~feature_hits(f_masks(student_df), key_codes(segments, F_FEATURES))
+    return pd.DataFrame(wrong, index=student_df.index, columns=list(F_COLUMNS))
+
+
+def diagnose_f_frame(student_df: pd.DataFrame) -> pd.DataFrame:
+    """``feature_diagnosis`` for rows matched to the key by their ``Word``."""
+    segments = [F_SEGMENTS[w] for w in student_df["Word"]]
+    return feature_diagnosis(f_masks(student_df), F_FEATURES, segments)
+
+
+def f_answer(answers, word):
+    if word == F_EXAMPLE:
+        return tuple(answers.get(word) or F_ANSWER_KEY[word])
+    return tuple(answers.get(word) or ("", "", ""))
+
+
+@timed("grading")
+def grade_f_cells(answers) -> list:
+    """``(voicing_ok, place_ok, manner_ok)`` for every row, example included."""
+    return [tuple(bool(m.get(normalize_cell(a), 0) >> c & 1)
+                  for a, m, c in zip(f_answer(answers, w), F_LABEL_MASKS, codes))
+            for w, codes in _f_key_codes().items()]
+
+
+@lru_cache(maxsize=1)
+def _f_key_codes() -> dict:
+    return dict(zip(F_WORDS, key_codes([F_SEGMENTS[w] for w in F_WORDS], F_FEATURES).tolist()))
+
+
+@timed("grading")
+def grade_f(answers) -> list:
+    return [all(cells) for w, cells in zip(F_WORDS, grade_f_cells(answers)) if w != F_EXAMPLE]
+
+
+# ---------------- Exercises K and L ----------------
+@timed("grading")
+def grade_k(responses) -> list:
+    return [responses.get(w) == K_ANSWER_KEY[w] for w in K_WORDS]
+
+
+@timed("grading")
+def grade_l(responses) -> list:
+    return [responses.get(q) == answer for q, answer in L_QUESTIONS.items()]
+
+
+# ---------------- Dispatch ----------------
+GRADERS = {
+    "A": grade_a,
+    "BC": grade_bc,
+    "D": grade_d,
+    "E": grade_e,
+    "F": grade_f,
+    "K": grade_k,
+    "L": grade_l,
+}
+
+_ITEM_LABELS = {
+    "A": tuple(str(n) for n in range(1, A_TOTAL_ITEMS + 1)),
+    "BC": BC_SYMBOLS,
+    "D": D_LETTERS,
+    "E": tuple(str(i) for i in range(1, len(E_QUESTIONS) + 1)),
+    "F": tuple(w for w in F_WORDS if w != F_EXAMPLE),
+    "K": K_WORDS,
+    "L": tuple(L_QUESTIONS),
+}
+
+
+def item_labels(exercise: str) -> tuple:
+    return _ITEM_LABELS[exercise]
+
+
+def grade(exercise: str, answers) -> list:
+    """Per-item correctness for ``exercise``."""
+    return GRADERS[exercise](answers)
+
+
+def grade_many(exercise: str, many) -> np.ndarray:
+    """Per-item correctness of many submissions, one row each.
+
+    Exercise E is scored in one array operation; the rest item by item.
+    """
+    if exercise == "E":
+        return score_e(e_masks(many))["exact"]
+    return np.array([grade(exercise, answers) for answers in many],
+                    dtype=bool).reshape(len(many), len(item_labels(exercise)))
+
+
+def score(exercise: str, answers) -> tuple:
+    """``(correct, total)`` for ``exercise``."""
+    items = grade(exercise, answers)
+    return sum(items), len(items)
+
+
+# ---------------- Per-cell results ----------------
+# B-C and F items are graded feature by feature; every other item is one cell.
+CELL_PARTS = {"BC": BC_COLUMNS, "F": F_COLUMNS}
+
+
+def cell_parts(exercise: str) -> tuple:
+    return CELL_PARTS.get(exercise, ("",))
+
+
+def cell_labels(exercise: str) -> list:
+    """``(item, part)`` of every scored cell, in table order."""
+    return [(item, part) for item in item_labels(exercise) for part in cell_parts(exercise)]
+
+
+def grade_cells(exercise: str, answers) -> list:
+    """``(item, part, correct)`` for every scored cell, in table order."""
+    return [(item, part, bool(ok)) for (item, part), ok
+            in zip(cell_labels(exercise), grade_cells_many(exercise, [answers])[0])]
+
+
+def grade_cells_many(exercise: str, many) -> np.ndarray:
+    """Correctness of every cell of many submissions, one row each.
+
+    B-C submissions are stacked into one frame and graded in a single call.
+    """
+    if exercise == "BC":
+        frame = pd.DataFrame([cells for rows in many for cells in _bc_cells(rows)],
+                             columns=list(BC_COLUMNS))
+        return ~grade_bc_frame(frame).to_numpy().reshape(len(many), -1)
+    if exercise == "F":
+        rows = [[ok for word, cells in zip(F_WORDS, grade_f_cells(answers)) if word != F_EXAMPLE
+                 for ok in cells] for answers in many]
+        return np.array(rows, dtype=bool).reshape(len(many), -1)
+    return grade_many(exercise, many)
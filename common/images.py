@@ -0,0 +1,91 @@
+"""Bundled figure images, decoded and resized once per process.
+
+Pages pass the returned bytes straight to ``st.image`` so the browser gets
+them from the app server instead of fetching a remote URL each rerun.
+"""
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+IMAGE_DIR = Path(__file__).resolve().parent.parent / "pages" / "images"
+
+# Figure 1.15 (vocal organs, Exercise A) ships as a one-page PDF wrapping a
+# single raster.  It is placed 423.3pt wide on the page, so e.g. 96 dpi means
+# a 564px image; the embedded raster (750px) caps the largest variant.
+FIGURE_1_15_PDF = IMAGE_DIR / "Fig1-15.pdf"
+FIGURE_1_15_WIDTH_PT = 423.3
+VOCAL_ORGAN_DPIS = (72, 96, 128)
+VOCAL_ORGAN_FORMATS = {"webp": ("WEBP", {"quality": 90}), "png": ("PNG", {"optimize": True})}
+
+
+@lru_cache(maxsize=64)
+def load_png(filename: str, width: int = None) -> bytes:
+    """PNG bytes of ``pages/images/<filename>``, resized to ``width`` pixels."""
+    with Image.open(IMAGE_DIR / filename) as im:
+        im.load()
+        if width and im.width != width:
+            height = round(im.height * width / im.width)
+            im = im.resize((width, height), Image.LANCZOS)
+        out = BytesIO()
+        im.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def diagram_d(letter: str, width: int = 360) -> bytes:
+    """Exercise D diagram (Figure 1.16 a–g)."""
+    return load_png(f"fig-16-{letter}.png", width)
+
+
+@lru_cache(maxsize=1)
+def _figure_1_15():
+    from pypdf import PdfReader
+    page = PdfReader(FIGURE_1_15_PDF).pages[0]
+    im = page.images[0].image
+    im.load()
+    return im
+
+
+def vocal_organ_width(dpi: int) -> int:
+    return min(round(FIGURE_1_15_WIDTH_PT * dpi / 72), _figure_1_15().width)
+
+
+def vocal_organ_filename(dpi: int, fmt: str) -> str:
+    return f"vocal_organ-{dpi}dpi.{fmt}"
+
+
+def rasterize_vocal_organ(dpi: int, fmt: str = "webp") -> bytes:
+    """Encode Figure 1.15 at ``dpi`` straight from the bundled PDF."""
+    im = _figure_1_15()
+    width = vocal_organ_width(dpi)
+    if width != im.width:
+        im = im.resize((width, round(im.height * width / im.width)), Image.LANCZOS)
+    pil_format, options = VOCAL_ORGAN_FORMATS[fmt]
+    out = BytesIO()
+    im.save(out, format=pil_format, **options)
+    return out.getvalue()
+
+
+@lru_cache(maxsize=len(VOCAL_ORGAN_DPIS) * len(VOCAL_ORGAN_FORMATS))
+def _vocal_organ(dpi: int, fmt: str) -> bytes:
+    # Prefer the files written by tools/build_images.py; otherwise rasterize
+    # on first use and keep the result in memory.
+    prebuilt = IMAGE_DIR / vocal_organ_filename(dpi, fmt)
+    if prebuilt.exists():
+        return prebuilt.read_bytes()
+    return rasterize_vocal_organ(dpi, fmt)
+
+
+def vocal_organ(width: int = None, fmt: str = "webp") -> bytes:
+    """Exercise A diagram, using the smallest variant at least ``width`` px wide.
+
+    Without a ``width`` the largest (full-resolution) variant is returned.
+    """
+    dpi = VOCAL_ORGAN_DPIS[-1]
+    if width:
+        for d in VOCAL_ORGAN_DPIS:
+            if vocal_organ_width(d) >= width:
+                dpi = d
+                break
+    return _vocal_organ(dpi, fmt)
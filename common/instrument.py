@@ -0,0 +1,192 @@
+"""Opt-in per-rerun instrumentation for the exercise pages.
+
+Enabled by setting ``PHONETICS_INSTRUMENT=1``.  Each page calls
+``begin_run(<exercise>)`` right after its imports and ``end_run()`` as its
+last statement.  For every rerun this records wall time, time spent in
+grading (via the ``timed`` decorator on those functions), time the student
+waited for PDF reports, the number of widgets created and the pickled size
+of ``st.session_state``.
+
+Reports mostly render in worker processes (``common.pdf_jobs``), outside
+any rerun, so ``pdf_s`` counts the wait instead: a report rendered inline
+during the rerun (``timed``), plus, on the rerun that delivers a queued
+report, how long it took since the first rerun that found it pending
+(``add_time``).
+
+Records go to a rotating JSON-lines log (``PHONETICS_INSTRUMENT_LOG``,
+default ``logs/reruns.jsonl``) and to an in-memory buffer that the Admin page
+summarizes.  When disabled every hook is a cheap no-op.
+"""
+import functools
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import defaultdict, deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+RECENT_PER_PAGE = 2000
+
+_pending = {}            # session id -> run record in progress
+_recent = defaultdict(lambda: deque(maxlen=RECENT_PER_PAGE))
+_lock = threading.Lock()
+_local = threading.local()
+_logger = None
+
+
+def enabled() -> bool:
+    return os.environ.get("PHONETICS_INSTRUMENT", "") not in ("", "0")
+
+
+def _get_logger():
+    global _logger
+    if _logger is None:
+        path = Path(os.environ.get("PHONETICS_INSTRUMENT_LOG", "logs/reruns.jsonl"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        logger = logging.getLogger("phonetics.reruns")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+
+def _ctx():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return get_script_run_ctx()
+
+
+def _session_key():
+    ctx = _ctx()
+    return ctx.session_id if ctx is not None else threading.get_ident()
+
+
+def _widget_count(ctx):
+    # Internal Streamlit state; its location has moved between releases.
+    ids = getattr(getattr(ctx, "shared", None), "widget_ids_this_run", None)
+    if ids is None:
+        ids = getattr(ctx, "widget_ids_this_run", None)
+    if ids is None:
+        return None
+    return len(ids.snapshot() if hasattr(ids, "snapshot") else ids)
+
+
+def _state_bytes():
+    import streamlit as st
+    total = 0
+    for key in list(st.session_state.keys()):
+        try:
+            total += len(pickle.dumps(st.session_state[key], protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:  # widgets' values are picklable; anything else is skipped
+            pass
+    return total
+
+
+def begin_run(page: str):
+    if not enabled():
+        return
+    key = _session_key()
+    with _lock:
+        # A run that never reached end_run() was cut short by st.rerun().
+        prev = _pending.pop(key, None)
+    if prev is not None:
+        _emit(prev, "interrupted")
+    run = {"page": page, "start": time.perf_counter(), "grading_s": 0.0, "pdf_s": 0.0}
+    with _lock:
+        _pending[key] = run
+    _local.run = run
+
+
+def end_run():
+    if not enabled():
+        return
+    with _lock:
+        run = _pending.pop(_session_key(), None)
+    if run is None:
+        return
+    ctx = _ctx()
+    run["widgets"] = _widget_count(ctx) if ctx is not None else None
+    run["state_bytes"] = _state_bytes() if ctx is not None else None
+    _emit(run, "ok")
+
+
+def _emit(run, status):
+    _local.run = None
+    record = {
+        "ts": time.time(),
+        "page": run["page"],
+        "status": status,
+        "wall_s": round(time.perf_counter() - run["start"], 6),
+        "grading_s": round(run["grading_s"], 6),
+        "pdf_s": round(run["pdf_s"], 6),
+        "widgets": run.get("widgets"),
+        "state_bytes": run.get("state_bytes"),
+    }
+    with _lock:
+        _recent[record["page"]].append(record)
+    _get_logger().info(json.dumps(record))
+
+
+def timed(section: str):
+    """Add the decorated function's time to ``<section>_s`` of the current run.
+
+    Only the outermost timed call is counted, so graders calling graders do
+    not double count.
+    """
+    field = f"{section}_s"
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = getattr(_local, "run", None)
+            if run is None or getattr(_local, "depth", 0):
+                return fn(*args, **kwargs)
+            _local.depth = 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _local.depth = 0
+                run[field] += time.perf_counter() - start
+        return wrapper
+    return decorator
+
+
+def add_time(section: str, seconds: float):
+    """Add ``seconds`` spent outside this thread to ``<section>_s`` of the current run."""
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run[f"{section}_s"] += seconds
+
+
+def recent_runs() -> dict:
+    """Snapshot of the in-memory records, by page."""
+    with _lock:
+        return {page: list(runs) for page, runs in _recent.items()}
+
+
+def _percentile(values, q):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def summarize(runs_by_page=None) -> list:
+    """One row per page with p50/p95 of each measurement."""
+    runs_by_page = recent_runs() if runs_by_page is None else runs_by_page
+    rows = []
+    for page in sorted(runs_by_page):
+        runs = runs_by_page[page]
+        row = {"page": page, "runs": len(runs)}
+        for field in ("wall_s", "grading_s", "pdf_s", "widgets", "state_bytes"):
+            values = [r.get(field) for r in runs]
+            row[f"{field} p50"] = _percentile(values, 0.50)
+            row[f"{field} p95"] = _percentile(values, 0.95)
+        rows.append(row)
+    return rows
@@ -0,0 +1,37 @@
+"""Deferred imports for the heavy libraries (pandas, numpy, reportlab).
+
+``lazy_import("pandas")`` returns a stand-in at once; the real import runs
+the first time one of its attributes is used. A page whose rerun never grades
+a table or renders a PDF therefore never loads those libraries, and a server
+only pays for them on the first export.
+
+Imports go through ``importlib.import_module``, so concurrent sessions rely
+on the interpreter's import lock like any other import.
+"""
+import importlib
+
+
+class LazyModule:
+    """Module stand-in that imports ``name`` on first attribute access."""
+
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -0,0 +1,20 @@
+"""Normalization applied to typed answers before comparing with a key."""
+import re
+import unicodedata
+
+
+def normalize(s: str) -> str:
+    """Free-text answers (Exercise A): ASCII, lower case, letters and spaces only."""
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+    s = s.lower().strip()
+    s = re.sub(r"[\-_/]", " ", s)
+    s = re.sub(r"[^a-z\s]", "", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def normalize_cell(text) -> str:
+    """Table cells (Exercise B-C): case, parentheses and spaces are ignored."""
+    if text is None:
+        return ""
+    return str(text).lower().replace("(", "").replace(")", "").replace(" ", "").strip()
@@ -0,0 +1,89 @@
+"""Content-addressed cache for rendered PDF reports.
+
+Reports are keyed on a hash of (exercise, name, answers, timestamp minute), so
+a rerun with unchanged answers gets the same bytes back without rendering.
+The cache lives at module level and is therefore shared by every session in
+the server process; it evicts least-recently-used reports once the total size
+goes over its byte budget.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _encode(obj):
+    # DataFrames (Exercise B-C) hash by content, not by their repr.
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict(orient="split")
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    return str(obj)
+
+
+def report_key(exercise: str, name: str, answers, timestamp: str) -> str:
+    payload = json.dumps([exercise, name, answers, timestamp],
+                         sort_keys=True, default=_encode, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """Thread-safe LRU of PDF bytes with a total byte budget."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def put(self, key, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get_or_render(self, key, render) -> bytes:
+        data = self.get(key)
+        if data is None:
+            with self._lock:
+                self.misses += 1
+            # Render outside the lock; two sessions racing on the same key
+            # both render once and store identical bytes.
+            data = render()
+            self.put(key, data)
+        return data
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+CACHE = ReportCache()
+
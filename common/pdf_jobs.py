@@ -0,0 +1,360 @@
+"""Background queue for rendering PDF reports.
+
+Reports render in a small process pool instead of the Streamlit script
+thread, so a whole class exporting at once does not queue behind one another
+inside the server. Jobs are keyed like ``common.pdf_cache`` (exercise, name,
+answers, timestamp minute): submitting the same report again returns the job
+already queued, and finished bytes also go into the shared report cache.
+Finished jobs are forgotten after ``RESULT_TTL`` seconds, failed ones as soon
+as the page has shown the error. A worker that dies (crash, OOM kill) breaks
+the pool; it is replaced on the next submit, and that request renders inline.
+
+Settings come from the environment:
+
+- ``PHONETICS_PDF_WORKERS``: worker processes (default 2)
+- ``PHONETICS_PDF_QUEUE``: most jobs waiting or rendering at once (default 32);
+  past that, reports render inline in the requesting session as before
+- ``PHONETICS_PDF_TTL``: seconds a finished job is kept (default 600)
+"""
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import context, reduction, spawn, util
+from pathlib import Path
+
+import streamlit as st
+
+from common.exercise_reports import render
+from common.instrument import add_time, enabled
+from common.pdf_cache import CACHE, report_key
+from common.report import report_timestamp
+
+MAX_WORKERS = int(os.environ.get("PHONETICS_PDF_WORKERS", "2"))
+MAX_PENDING = int(os.environ.get("PHONETICS_PDF_QUEUE", "32"))
+RESULT_TTL = float(os.environ.get("PHONETICS_PDF_TTL", "600"))
+POLL_INTERVAL = 0.5
+WAITS_KEY = "pdf_waits"   # session state: exercise -> (job key, first seen pending)
+ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+# ---------------- Worker processes ----------------
+# Streamlit installs the running page as ``__main__``, and a "spawn" worker
+# re-runs the parent's ``__main__`` before taking jobs, i.e. it would execute
+# the page in every new worker. Workers are launched from a context that
+# leaves the main module out of what they are told to prepare, so they only
+# import what a job needs (``render`` pulls in common.exercise_reports).
+#
+# multiprocessing has no public hook for this: ``_WorkerPopen._launch`` is a
+# copy of CPython's private ``popen_spawn_posix.Popen._launch``, which is the
+# same in Python 3.10 through 3.13 (checked against each). On any other
+# version, and on Windows, plain "spawn" is used, and every new worker runs
+# the page once in bare mode before taking jobs.
+LAUNCH_CHECKED = ((3, 10), (3, 13))
+
+if sys.platform != "win32" and LAUNCH_CHECKED[0] <= sys.version_info[:2] <= LAUNCH_CHECKED[1]:
+    from multiprocessing import popen_spawn_posix
+
+    class _WorkerPopen(popen_spawn_posix.Popen):
+        def _launch(self, process_obj):
+            # popen_spawn_posix.Popen._launch, minus the main module.
+            from multiprocessing import resource_tracker
+            tracker_fd = resource_tracker.getfd()
+            self._fds.append(tracker_fd)
+            prep_data = spawn.get_preparation_data(process_obj._name)
+            prep_data.pop("init_main_from_name", None)
+            prep_data.pop("init_main_from_path", None)
+            fp = io.BytesIO()
+            context.set_spawning_popen(self)
+            try:
+                reduction.dump(prep_data, fp)
+                reduction.dump(process_obj, fp)
+            finally:
+                context.set_spawning_popen(None)
+
+            parent_r = child_w = child_r = parent_w = None
+            try:
+                parent_r, child_w = os.pipe()
+                child_r, parent_w = os.pipe()
+                cmd = spawn.get_command_line(tracker_fd=tracker_fd, pipe_handle=child_r)
+                self._fds.extend([child_r, child_w])
+                self.pid = util.spawnv_passfds(spawn.get_executable(), cmd, self._fds)
+                self.sentinel = parent_r
+                with open(parent_w, "wb", closefd=False) as f:
+                    f.write(fp.getbuffer())
+            finally:
+                self.finalizer = util.Finalize(
+                    self, util.close_fds, [fd for fd in (parent_r, parent_w) if fd is not None])
+                for fd in (child_r, child_w):
+                    if fd is not None:
+                        os.close(fd)
+
+    class _WorkerProcess(context.SpawnProcess):
+        @staticmethod
+        def _Popen(process_obj):
+            return _WorkerPopen(process_obj)
+
+    class _WorkerContext(context.SpawnContext):
+        Process = _WorkerProcess
+
+    WORKER_CONTEXT = _WorkerContext()
+else:
+    WORKER_CONTEXT = context.SpawnContext()
+
+
+def _inline(*args) -> Future:
+    """Render in the calling thread; the future holds the bytes or the error."""
+    future = Future()
+    try:
+        future.set_result(render(*args))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+class ReportJob:
+    """One report render; ``future`` resolves to the PDF bytes."""
+
+    __slots__ = ("key", "future", "submitted", "finished")
+
+    def __init__(self, key: str, future: Future):
+        self.key = key
+        self.future = future
+        self.submitted = time.monotonic()
+        self.finished = None
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self) -> bytes:
+        return self.future.result()
+
+
+def _copy_outcome(source: Future, target: Future):
+    if source.cancelled():  # queued on a pool that broke
+        target.set_exception(BrokenProcessPool("report worker pool was shut down"))
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def _finished(data: bytes) -> Future:
+    future = Future()
+    future.set_result(data)
+    return future
+
+
+class ReportQueue:
+    """Deduplicating, bounded queue of report renders on a process pool."""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_pending: int = MAX_PENDING,
+                 ttl: float = RESULT_TTL):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Created on first use; "spawn" keeps the workers clear of the
+        # server's threads, which a fork would copy mid-flight.
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=WORKER_CONTEXT)
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        """Drop a broken pool; the next submit starts a fresh one."""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, *args) -> Future:
+        # Worker processes are started from inside submit() and copy our
+        # sys.path; make sure ``common`` is on it even when called from a
+        # thread outside a script run (e.g. the warm-up). Never called with
+        # ``_lock`` held, as starting a worker takes a while.
+        if ROOT not in sys.path:
+            sys.path.append(ROOT)
+        pool = None
+        try:
+            pool = self._executor()
+            future = pool.submit(render, *args)
+        except Exception:
+            # A worker died (BrokenProcessPool), the pool was shut down under
+            # us, or a worker could not be started: render this one here, and
+            # let the next submit start a fresh pool.
+            if pool is not None:
+                self._discard(pool)
+            return _inline(*args)
+
+        def check(done: Future):
+            if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+                self._discard(pool)
+        future.add_done_callback(check)
+        return future
+
+    def _expire(self, now: float):
+        for key, job in list(self._jobs.items()):
+            if job.finished is not None and (now - job.finished > self.ttl
+                                             or job.future.exception() is not None):
+                del self._jobs[key]
+
+    def _pending(self) -> list:
+        return [job for job in self._jobs.values() if not job.done()]
+
+    def _on_done(self, job: ReportJob):
+        def callback(future: Future):
+            job.finished = time.monotonic()
+            if future.exception() is None:
+                CACHE.put(job.key, future.result())
+        return callback
+
+    def submit(self, exercise: str, name: str, answers, timestamp: str = None) -> ReportJob:
+        """Queue a report (or return the identical job already known).
+
+        ``timestamp`` defaults to the current minute; pass a saved one to get
+        back a report rendered earlier.
+        """
+        timestamp = timestamp or report_timestamp()
+        key = report_key(exercise, name, answers, timestamp)
+        with self._lock:
+            self._expire(time.monotonic())
+            job = self._jobs.get(key)
+            if job is not None:
+                return job
+            data = CACHE.get(key)
+            if data is not None:
+                job = self._jobs[key] = ReportJob(key, _finished(data))
+                job.finished = time.monotonic()
+                return job
+            if len(self._pending()) < self.max_pending:
+                job = self._jobs[key] = ReportJob(key, Future())
+                job.future.add_done_callback(self._on_done(job))
+            else:
+                job = None
+        if job is None:
+            # Queue full: render here, in the requesting session, as before.
+            job = ReportJob(key, _inline(exercise, name, answers, timestamp))
+            self._on_done(job)(job.future)
+            return job
+        self._submit(exercise, name, answers, timestamp).add_done_callback(
+            lambda done: _copy_outcome(done, job.future))
+        return job
+
+    def forget(self, key: str):
+        """Drop a finished job, e.g. a failed one that is about to be retried."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.done():
+                del self._jobs[key]
+
+    def warm_up(self, jobs) -> int:
+        """Start the workers and render throwaway ``(exercise, name, answers)`` jobs.
+
+        Nothing is cached; the point is that each worker has imported ReportLab
+        and built its stylesheet before the first real export. Returns the
+        number of jobs rendered.
+        """
+        futures = [self._submit(*job) for job in jobs]
+        for future in futures:
+            future.result()
+        return len(futures)
+
+    def get(self, key: str):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def ahead_of(self, key: str) -> int:
+        """Unfinished jobs submitted before ``key`` (0 when it is not queued)."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.done():
+                return 0
+            return sum(1 for other in self._pending() if other.submitted < job.submitted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending())
+            return {"pending": pending, "finished": len(self._jobs) - pending}
+
+
+QUEUE = ReportQueue()
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def wait_for(key: str):
+    """Progress note for a queued job; reruns the page once it has finished."""
+    job = QUEUE.get(key)
+    if job is None or job.done():
+        st.rerun()
+    ahead = QUEUE.ahead_of(key)
+    if ahead < QUEUE.max_workers:
+        st.info("⏳ Preparing your report…")
+    else:
+        st.info(f"⏳ Your report is queued ({ahead - QUEUE.max_workers + 1} ahead of you)…")
+
+
+def ready_report(exercise: str, name: str, answers):
+    """The report's bytes once rendered, else ``None``.
+
+    Call on every rerun with the current answers. While the job is queued or
+    rendering, a self-refreshing fragment shows its progress and reruns the
+    page once the bytes are ready; the rest of the page stays usable. A
+    failed render shows an error and is forgotten, so the next rerun (or the
+    retry button) renders it afresh.
+    """
+    job = QUEUE.submit(exercise, name, answers)
+    _count_wait(exercise, job)
+    if not job.done():
+        wait_for(job.key)
+        return None
+    if job.future.exception() is None:
+        return job.result()
+    QUEUE.forget(job.key)
+    report_failed(exercise)
+    return None
+
+
+def _count_wait(exercise: str, job: ReportJob):
+    """Add the session's wait for a queued report to the rerun that receives it."""
+    if not enabled():
+        return
+    waits = st.session_state.setdefault(WAITS_KEY, {})
+    if not job.done():
+        if waits.get(exercise, (None,))[0] != job.key:
+            waits[exercise] = (job.key, time.monotonic())
+        return
+    key, since = waits.pop(exercise, (None, None))
+    if key == job.key:
+        add_time("pdf", (job.finished or time.monotonic()) - since)
+
+
+def report_failed(retry_key: str):
+    """Error note with a retry button, for a render that raised."""
+    st.error("⚠️ Your report could not be created. Please try again.")
+    if st.button("🔄 Try again", key=f"retry_report_{retry_key}"):
+        st.rerun()
+
+
+def request_report(state: dict, exercise: str, name: str, answers):
+    """Remember in ``state["export"]`` which answers a report was asked for."""
+    state["export"] = report_key(exercise, name, answers, "")
+
+
+def requested_report(state: dict, exercise: str, name: str, answers):
+    """``ready_report`` while the answers are those last requested, else ``None``.
+
+    Editing the answers after an export withdraws the request, so edits do
+    not queue a render each until the student asks again.
+    """
+    if state.get("export") != report_key(exercise, name, answers, ""):
+        return None
+    return ready_report(exercise, name, answers)
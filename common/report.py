@@ -0,0 +1,110 @@
+"""PDF report engine shared by every exercise page.
+
+The stylesheet, header styles and table-style templates are built once per
+process, on the first report; each report only creates its own flowables.
+ReportLab itself is imported lazily (``common.lazy``), so importing this
+module for ``report_timestamp`` costs nothing.
+"""
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from common.instrument import timed
+from common.lazy import lazy_import
+from reportlab.lib.pagesizes import A4  # plain constants, cheap to import
+
+colors = lazy_import("reportlab.lib.colors")
+platypus = lazy_import("reportlab.platypus")
+rl_styles = lazy_import("reportlab.lib.styles")
+
+
+@lru_cache(maxsize=1)
+def base_table_style():
+    """Base look of every report table: blue header row, grey grid, centered cells."""
+    return platypus.TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ])
+
+
+@lru_cache(maxsize=1)
+def get_styles():
+    """Process-wide ReportLab stylesheet (``getSampleStyleSheet`` is slow)."""
+    return rl_styles.getSampleStyleSheet()
+
+
+@lru_cache(maxsize=32)
+def _title_markup(title: str) -> str:
+    return f"<b>{title}</b>"
+
+
+def report_timestamp() -> str:
+    """Timestamp printed in the report header (minute resolution)."""
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+
+def wrong_cell_cmds(col: int, row: int) -> list:
+    """Black cell with white text, used to mark an incorrect answer."""
+    return [
+        ("BACKGROUND", (col, row), (col, row), colors.black),
+        ("TEXTCOLOR", (col, row), (col, row), colors.white),
+    ]
+
+
+def header_flowables(title: str, name: str, timestamp: str) -> list:
+    styles = get_styles()
+    return [
+        platypus.Paragraph(_title_markup(title), styles["Title"]),
+        platypus.Spacer(1, 12),
+        platypus.Paragraph(f"Name: {escape(name)}", styles["Normal"]),
+        platypus.Paragraph(f"Timestamp: {timestamp}", styles["Normal"]),
+        platypus.Spacer(1, 12),
+    ]
+
+
+def table_flowable(header, rows, correct=None):
+    """Report table; ``correct[r][c] is False`` shades body cell (r, c) black.
+
+    ``correct`` follows the shape of ``rows``; ``None`` entries (or a missing
+    grid) are left unshaded.
+    """
+    tbl = platypus.Table([list(header)] + [list(r) for r in rows], repeatRows=1)
+    tbl.setStyle(base_table_style())
+    if correct is not None:
+        cmds = []
+        for r, row_ok in enumerate(correct, start=1):
+            for c, ok in enumerate(row_ok):
+                if ok is False:
+                    cmds += wrong_cell_cmds(c, r)
+        if cmds:
+            tbl.setStyle(platypus.TableStyle(cmds))
+    return tbl
+
+
+@timed("pdf")
+def render_report(title: str, name: str, header=None, rows=(), correct=None,
+                  paragraphs=(), timestamp: str = None) -> bytes:
+    """Render a report and return the PDF bytes.
+
+    Table reports pass ``header``/``rows`` (plus optional per-cell
+    ``correct``); text reports pass ``paragraphs``, a sequence of blocks where
+    each block is a list of lines followed by a small gap.
+    """
+    buffer = BytesIO()
+    doc = platypus.SimpleDocTemplate(buffer, pagesize=A4)
+    normal = get_styles()["Normal"]
+    elements = header_flowables(title, name, timestamp or report_timestamp())
+
+    if header is not None:
+        elements.append(table_flowable(header, rows, correct))
+
+    for block in paragraphs:
+        elements.extend(platypus.Paragraph(escape(line), normal) for line in block)
+        elements.append(platypus.Spacer(1, 6))
+
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,45 @@
+"""Realistic sample answers, used by benchmarks, warm-up and load tests.
+
+``sample_answers(exercise, seed)`` returns answers in the page's shape that
+are mostly right with a few deterministic mistakes, so reports exercise both
+the plain and the shaded-cell paths.
+"""
+import random
+
+from common.exercises import (
+    A_ANSWER_KEY, BC_ANSWER_KEY, BC_COLUMNS, BC_SYMBOLS, D_LETTERS, E_OPTIONS, E_QUESTIONS,
+    F_ANSWER_KEY, F_MANNER_OPTIONS, F_PLACE_OPTIONS, F_VOICING_OPTIONS, F_WORDS,
+    K_ANSWER_KEY, K_OPTIONS, L_OPTIONS, L_QUESTIONS,
+)
+
+_D_SAMPLE = {"place": "bilabial", "manner": "stop", "example": "pie"}
+
+
+def sample_answers(exercise: str, seed: int = 0, error_rate: float = 0.2):
+    rng = random.Random(f"{exercise}:{seed}")
+
+    def wrong():
+        return rng.random() < error_rate
+
+    if exercise == "A":
+        return {n: ("palate" if wrong() else accept[0]) for n, accept in A_ANSWER_KEY.items()}
+    if exercise == "BC":
+        return [[("voiced" if wrong() else row[str(c)]) for c in range(1, len(BC_COLUMNS) + 1)]
+                for row in BC_ANSWER_KEY[:len(BC_SYMBOLS)]]
+    if exercise == "D":
+        return {k: dict(_D_SAMPLE) for k in D_LETTERS}
+    if exercise == "E":
+        answers = []
+        for (_, correct), options in zip(E_QUESTIONS, E_OPTIONS):
+            flipped = rng.choice(options) if wrong() else None
+            answers.append([w for w in options if (w in correct) != (w == flipped)])
+        return answers
+    if exercise == "F":
+        choices = (F_VOICING_OPTIONS, F_PLACE_OPTIONS, F_MANNER_OPTIONS)
+        return {w: [rng.choice(opts) if wrong() else key for opts, key in zip(choices, F_ANSWER_KEY[w])]
+                for w in F_WORDS}
+    if exercise == "K":
+        return {w: (rng.choice(K_OPTIONS) if wrong() else key) for w, key in K_ANSWER_KEY.items()}
+    if exercise == "L":
+        return {q: (rng.choice(L_OPTIONS[q]) if wrong() else key) for q, key in L_QUESTIONS.items()}
+    raise KeyError(exercise)
@@ -0,0 +1,70 @@
+"""Namespaced, compact session state for the exercise pages.
+
+Each exercise keeps everything in one dict at ``st.session_state["ex:<id>"]``
+so pages can't clobber each other's keys (A and E both used to store bare
+``answers``/``checked``/``results``).  Answers are stored in compact form:
+option indices instead of words, and bitmasks for per-item flags.  Only the
+``MAX_LIVE_EXERCISES`` most recently visited exercises keep their derived
+state (check results, feedback, report requests); older ones drop it when
+another page is opened and rebuild it from the factory on return.  Answers
+are never evicted.
+"""
+import streamlit as st
+
+PREFIX = "ex:"
+ORDER_KEY = "ex:_order"
+MAX_LIVE_EXERCISES = 2
+
+# exercise -> keys of its namespace that can be dropped and rebuilt
+_DERIVED = {}
+
+
+def exercise_state(exercise: str, factory, derived=()) -> dict:
+    """The state dict for ``exercise``, created with ``factory()`` if missing.
+
+    ``derived`` names the keys that may be evicted (results and the like);
+    they come back from ``factory()`` when the page is visited again.
+    """
+    _DERIVED[exercise] = tuple(derived)
+    key = PREFIX + exercise
+    state = st.session_state.get(key)
+    if state is None:
+        state = st.session_state[key] = factory()
+    elif any(k not in state for k in _DERIVED[exercise]):
+        for k, v in factory().items():
+            state.setdefault(k, v)
+    _touch(exercise)
+    return state
+
+
+def reset_state(exercise: str, factory) -> dict:
+    st.session_state[PREFIX + exercise] = state = factory()
+    return state
+
+
+def _touch(exercise: str):
+    order = [e for e in st.session_state.get(ORDER_KEY, ()) if e != exercise]
+    order.append(exercise)
+    for old in order[:-MAX_LIVE_EXERCISES]:
+        state = st.session_state.get(PREFIX + old)
+        for k in _DERIVED.get(old, ()) if state is not None else ():
+            state.pop(k, None)
+    st.session_state[ORDER_KEY] = tuple(order[-MAX_LIVE_EXERCISES:])
+
+
+# ---------------- Compact encodings ----------------
+def to_mask(flags) -> int:
+    """Pack an iterable of bools into an int (item 0 = lowest bit)."""
+    mask = 0
+    for i, flag in enumerate(flags):
+        if flag:
+            mask |= 1 << i
+    return mask
+
+
+def from_mask(mask: int, n: int) -> list:
+    return [bool(mask >> i & 1) for i in range(n)]
+
+
+def selected_of(mask: int, options) -> list:
+    return [opt for i, opt in enumerate(options) if mask >> i & 1]
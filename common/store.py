@@ -0,0 +1,321 @@
+"""Optional SQLite store for checks and exports.
+
+Disabled unless ``PHONETICS_DB`` names a database file.  Pages call
+``record_event`` which only enqueues; a single background thread drains the
+queue and writes in batches, so the script thread never waits on disk.  The
+database runs in WAL mode so reads (exports, analytics) don't block the
+writer.
+
+Alongside the raw log the writer keeps ``item_stats``: per exercise, item and
+part (the B-C and F features), how many checks graded that cell and how many
+got it wrong.  The counters are bumped in the same transaction as each batch
+of checks, so item analysis reads a few hundred rows however many submissions
+there are.  A database that predates the table is backfilled from its log
+once, when the store starts.
+
+The same writer also saves the autosaved drafts (see ``common.autosave``).
+Drafts are merged in memory, latest answers per student and exercise win,
+and written once nothing has changed for ``draft_delay`` seconds, so a burst
+of keystrokes is one row write and all writes go through this one thread.
+
+A batch that fails to write (a locked or full disk, a row the grader
+chokes on) is logged and retried a few times, then dropped; the writer
+thread keeps running either way.
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id       INTEGER PRIMARY KEY,
+    ts       REAL    NOT NULL,
+    student  TEXT    NOT NULL,
+    exercise TEXT    NOT NULL,
+    kind     TEXT    NOT NULL,   -- 'check' or 'export'
+    score    INTEGER,
+    total    INTEGER,
+    answers  TEXT    NOT NULL    -- JSON, same shape as the page state
+);
+CREATE INDEX IF NOT EXISTS events_student ON events (student, exercise, ts);
+CREATE INDEX IF NOT EXISTS events_exercise ON events (exercise, ts);
+CREATE TABLE IF NOT EXISTS item_stats (
+    exercise TEXT    NOT NULL,
+    item     TEXT    NOT NULL,
+    part     TEXT    NOT NULL,   -- feature column for B-C and F, else ''
+    checks   INTEGER NOT NULL,
+    wrong    INTEGER NOT NULL,
+    PRIMARY KEY (exercise, item, part)
+);
+CREATE TABLE IF NOT EXISTS drafts (
+    student  TEXT NOT NULL,   -- name as typed, case and spacing folded
+    exercise TEXT NOT NULL,
+    ts       REAL NOT NULL,
+    answers  TEXT NOT NULL,   -- JSON, same shape as the page state
+    PRIMARY KEY (student, exercise)
+);
+"""
+
+_STOP = object()
+_WAKE = object()    # a draft changed; recompute how long to wait
+_DELETE = None      # pending draft value that removes the row
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class SubmissionStore:
+    """Batched, single-writer event log (and draft store)."""
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 0.5,
+                 draft_delay: float = 2.0, retries: int = 3, written_limit: int = 2048):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.draft_delay = draft_delay
+        self.retries = retries
+        self.written_limit = written_limit
+        self._queue = queue.Queue()
+        self._drafts = {}   # (student, exercise) -> (ts, JSON) or _DELETE, not yet written
+        # (student, exercise) -> JSON last handed to the writer, most recent
+        # last; only skips repeat saves, so forgetting old entries is safe.
+        self._written = OrderedDict()
+        self._draft_lock = threading.Lock()
+        self._draft_change = 0.0
+        self._conn = connect(path)
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._thread = threading.Thread(target=self._run, name="submission-store", daemon=True)
+        self._thread.start()
+
+    def record(self, exercise, kind, student, answers, score=None, total=None):
+        row = (time.time(), student or "", exercise, kind, score, total,
+               json.dumps(answers, ensure_ascii=False, default=str))
+        self._queue.put(row)
+
+    # ---------------- Drafts ----------------
+    def save_draft(self, student: str, exercise: str, answers):
+        data = json.dumps(answers, ensure_ascii=False, default=str)
+        key = (student, exercise)
+        with self._draft_lock:
+            if self._written.get(key) == data:
+                self._written.move_to_end(key)
+                return
+            self._written[key] = data
+            self._written.move_to_end(key)
+            if len(self._written) > self.written_limit:
+                self._written.popitem(last=False)
+            self._set_draft(key, (time.time(), data))
+
+    def discard_draft(self, student: str, exercise: str):
+        key = (student, exercise)
+        with self._draft_lock:
+            self._written.pop(key, None)
+            self._set_draft(key, _DELETE)
+
+    def _set_draft(self, key, value):
+        wake = not self._drafts
+        self._drafts[key] = value
+        self._draft_change = time.monotonic()
+        if wake:
+            self._queue.put(_WAKE)
+
+    def load_draft(self, student: str, exercise: str):
+        """``(ts, answers)`` of the saved draft, or ``None``."""
+        key = (student, exercise)
+        with self._draft_lock:
+            if key in self._drafts:
+                pending = self._drafts[key]
+                return None if pending is _DELETE else (pending[0], json.loads(pending[1]))
+            row = self._reader.execute(
+                "SELECT ts, answers FROM drafts WHERE student = ? AND exercise = ?", key
+            ).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def _draft_wait(self):
+        """Seconds until pending drafts are due, ``None`` when there are none."""
+        with self._draft_lock:
+            if not self._drafts:
+                return None
+            return max(0.0, self.draft_delay - (time.monotonic() - self._draft_change))
+
+    def _take_drafts(self, force: bool = False) -> dict:
+        with self._draft_lock:
+            quiet = time.monotonic() - self._draft_change >= self.draft_delay
+            if not self._drafts or not (quiet or force):
+                return {}
+            drafts, self._drafts = self._drafts, {}
+            return drafts
+
+    # ---------------- Writer ----------------
+    def _get(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        try:
+            self._backfill()
+        except Exception:
+            LOGGER.exception("submission store: item_stats backfill failed")
+        stop = False
+        while not stop:
+            item = self._get(self._draft_wait())
+            batch = []
+            if item is _STOP:
+                stop = True
+            elif item is not None and item is not _WAKE:
+                batch.append(item)
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    item = self._get(timeout)
+                    if item is None:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    if item is not _WAKE:
+                        batch.append(item)
+            drafts = self._take_drafts(force=stop)
+            if batch or drafts:
+                self._flush(batch, drafts)
+
+    def _flush(self, batch, drafts):
+        """Write one batch, retrying on SQLite errors; drop it if that keeps failing."""
+        for attempt in range(self.retries + 1):
+            try:
+                self._write(batch, drafts)
+                return
+            except sqlite3.OperationalError as exc:   # locked, disk full, ...
+                if attempt < self.retries:
+                    LOGGER.warning("submission store: write failed (%s), retrying", exc)
+                    time.sleep(0.5 * 2 ** attempt)
+                    continue
+                error = exc
+            except Exception as exc:
+                LOGGER.exception("submission store: write failed")
+                error = exc
+                break
+        LOGGER.warning("submission store: dropped %d events and %d drafts (%s)",
+                       len(batch), len(drafts), error)
+        with self._draft_lock:
+            for key in drafts:
+                # Let the next save of these answers queue them again.
+                self._written.pop(key, None)
+
+    def _write(self, batch, drafts=None):
+        checks = [(row[2], row[6]) for row in batch if row[3] == "check"]
+        try:
+            counts = cell_counts(checks)
+        except Exception:
+            # Keep the log; only these checks go uncounted.
+            LOGGER.exception("submission store: could not count %d checks", len(checks))
+            counts = {}
+        drafts = drafts or {}
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO events (ts, student, exercise, kind, score, total, answers)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            self._add_counts(counts)
+            self._conn.executemany(
+                "INSERT INTO drafts (student, exercise, ts, answers) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (student, exercise) DO UPDATE SET ts = excluded.ts,"
+                " answers = excluded.answers",
+                [(*key, *value) for key, value in drafts.items() if value is not _DELETE])
+            self._conn.executemany(
+                "DELETE FROM drafts WHERE student = ? AND exercise = ?",
+                [key for key, value in drafts.items() if value is _DELETE])
+
+    def _add_counts(self, counts):
+        self._conn.executemany(
+            "INSERT INTO item_stats (exercise, item, part, checks, wrong) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (exercise, item, part) DO UPDATE SET"
+            " checks = checks + excluded.checks, wrong = wrong + excluded.wrong",
+            [(*cell, checks, wrong) for cell, (checks, wrong) in counts.items()])
+
+    def _backfill(self, chunk: int = 5000):
+        """Count the logged checks once if ``item_stats`` is new to this database."""
+        if self._conn.execute("SELECT 1 FROM item_stats LIMIT 1").fetchone():
+            return
+        cursor = self._conn.execute("SELECT exercise, answers FROM events WHERE kind = 'check'")
+        with self._conn:
+            while True:
+                rows = cursor.fetchmany(chunk)
+                if not rows:
+                    return
+                self._add_counts(cell_counts(rows))
+
+    def close(self):
+        """Flush everything queued so far and stop the writer."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._conn.close()
+        self._reader.close()
+
+
+def cell_counts(checks) -> dict:
+    """``{(exercise, item, part): (checks, wrong)}`` over ``(exercise, answers JSON)`` pairs."""
+    from common.grading import cell_labels, grade_cells_many
+    by_exercise = {}
+    for exercise, answers in checks:
+        by_exercise.setdefault(exercise, []).append(json.loads(answers))
+    counts = {}
+    for exercise, many in by_exercise.items():
+        wrong = (~grade_cells_many(exercise, many)).sum(axis=0)
+        for (item, part), n in zip(cell_labels(exercise), wrong.tolist()):
+            counts[exercise, item, part] = (len(many), n)
+    return counts
+
+
+def item_stats(path: str) -> list:
+    """All ``(exercise, item, part, checks, wrong)`` counters, read without the writer."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute(
+            "SELECT exercise, item, part, checks, wrong FROM item_stats").fetchall()
+    finally:
+        conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store, or ``None`` when ``PHONETICS_DB`` is unset."""
+    global _store
+    path = os.environ.get("PHONETICS_DB")
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SubmissionStore(
+                path, draft_delay=float(os.environ.get("PHONETICS_AUTOSAVE_DELAY", 2.0)))
+            atexit.register(_store.close)
+    return _store
+
+
+def record_event(exercise, kind, student, answers):
+    """Log a check or export; graded here so pages don't have to pass scores."""
+    store = get_store()
+    if store is not None:
+        from common.grading import score
+        store.record(exercise, kind, student, answers, *score(exercise, answers))
@@ -0,0 +1,111 @@
+"""Fill the process-wide caches before the first students arrive.
+
+A class logging in at once otherwise makes the first visitor of each page pay
+for the heavy imports, the ReportLab stylesheet and font metrics, image
+decoding, the graded-table keys and the PDF worker processes, all at the
+same moment. ``warm_up()`` does that work up front, one timed step at a time,
+and logs each step to the server console.
+
+``start_warm_up()`` runs it once per server process on a background thread;
+``HOME.py`` calls it, so the first page view triggers it without waiting for
+it. Set ``PHONETICS_WARMUP=0`` to turn it off. To warm a server from the
+command line (and see the timings), in that process only::
+
+    python -m common.warmup
+"""
+import os
+import threading
+import time
+
+from streamlit.logger import get_logger
+
+from common.exercises import D_LETTERS, EXERCISE_IDS
+from common.samples import sample_answers
+
+LOGGER = get_logger(__name__)
+WARMUP_NAME = "Warm-up"
+
+_started = False
+_lock = threading.Lock()
+
+
+def _keys():
+    from common.grading import score, segment_codes
+    segment_codes()
+    # Grading one sample per exercise also loads pandas/numpy for B-C and F.
+    for exercise in EXERCISE_IDS:
+        score(exercise, sample_answers(exercise))
+
+
+def _styles():
+    from common.report import base_table_style, get_styles
+    from reportlab.pdfbase import pdfmetrics
+    get_styles()
+    base_table_style()
+    for font in ("Helvetica", "Helvetica-Bold"):
+        pdfmetrics.getFont(font)
+
+
+def _images():
+    from common.images import diagram_d, vocal_organ
+    vocal_organ()
+    for letter in D_LETTERS:
+        diagram_d(letter, 360)
+
+
+def _reports():
+    from common.exercise_reports import RENDERERS, render
+    for exercise in RENDERERS:
+        render(exercise, WARMUP_NAME, sample_answers(exercise))
+
+
+def _workers():
+    from common.exercise_reports import RENDERERS
+    from common.pdf_jobs import QUEUE
+    jobs = [(exercise, WARMUP_NAME, sample_answers(exercise))
+            for _ in range(QUEUE.max_workers) for exercise in RENDERERS]
+    QUEUE.warm_up(jobs)
+
+
+STEPS = (
+    ("answer keys", _keys),
+    ("stylesheet and fonts", _styles),
+    ("images", _images),
+    ("reports", _reports),
+    ("pdf workers", _workers),
+)
+
+
+def warm_up() -> dict:
+    """Run every step; returns ``{step: seconds}``. A failing step is logged and skipped."""
+    timings = {}
+    total = time.perf_counter()
+    for label, step in STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            LOGGER.exception("warm-up: %s failed", label)
+            continue
+        timings[label] = time.perf_counter() - start
+        LOGGER.info("warm-up: %s in %.0f ms", label, timings[label] * 1000)
+    LOGGER.info("warm-up: done in %.0f ms", (time.perf_counter() - total) * 1000)
+    return timings
+
+
+def start_warm_up() -> bool:
+    """Start ``warm_up`` on a daemon thread, once per process. True if started now."""
+    global _started
+    if os.environ.get("PHONETICS_WARMUP", "1") == "0":
+        return False
+    with _lock:
+        if _started:
+            return False
+        _started = True
+    threading.Thread(target=warm_up, name="phonetics-warmup", daemon=True).start()
+    return True
+
+
+if __name__ == "__main__":
+    for label, seconds in warm_up().items():
+        print(f"{label:<22} {seconds * 1000:8.1f} ms")
@@ -1,66 +1,34 @@
-import re
-import unicodedata
 import streamlit as st
+from common.chapter_report import record_section
+from common.exercises import A_ANSWER_KEY as ANSWER_KEY, A_TOTAL_ITEMS as TOTAL_ITEMS
+from common.grading import a_item_correct as is_correct
+from common.images import vocal_organ
+from common.instrument import begin_run, end_run
+from common.state import exercise_state, from_mask, reset_state, to_mask
+from common.store import record_event
+
+begin_run("A")
 
 # ---------------- Page setup ----------------
 st.set_page_config(page_title="Vocal Organs Quiz", page_icon="🗣️", layout="wide")
 st.markdown("#### 🗣️ Understanding Speech Production")
-st.write("For this activity, capture the screen; there's no pdf generation for this.")
-
-# ---------------- Image + Answer Key ----------------
-IMAGE_URL = "https://raw.githubusercontent.com/MK316/english-phonetics/main/pages/images/vocal_organ.png"
-TOTAL_ITEMS = 14
-
-ANSWER_KEY = {
-    1:  ["upper lip"],
-    2:  ["upper teeth"],
-    3:  ["alveolar ridge"],
-    4:  ["hard palate"],
-    5:  ["soft palate", "velum"],
-    6:  ["uvula"],
-    7:  ["epiglottis"],
-    8:  ["lower lip"],
-    9:  ["tongue tip", "tip of the tongue"],
-    10: ["tongue blade", "blade of the tongue"],
-    11: ["front of the tongue", "tongue front"],
-    12: ["center of the tongue", "tongue center"],
-    13: ["back of the tongue", "tongue back"],
-    14: ["tongue root", "root of the tongue"],
-}
-
-# ---------------- Helpers ----------------
-def normalize(s: str) -> str:
-    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
-    s = s.lower().strip()
-    s = re.sub(r"[\-_/]", " ", s)
-    s = re.sub(r"[^a-z\s]", "", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-def is_correct(num: int, user_text: str) -> bool:
-    if not user_text:
-        return False
-    gold = [normalize(x) for x in ANSWER_KEY.get(num, [])]
-    guess = normalize(user_text)
-    return guess in gold or (guess.endswith("s") and guess[:-1] in gold) or ((guess + "s") in gold)
+st.write("Checking your answers adds them to your Chapter 1 report on the home page; "
+         "this exercise has no report of its own.")
 
 # ---------------- Main App UI ----------------
-st.image(IMAGE_URL, use_container_width=True,
+st.image(vocal_organ(), use_container_width=True,
          caption="Refer to the numbers (1–14) on this diagram.")
 
-if "answers" not in st.session_state:
-    st.session_state.answers = {i: "" for i in range(1, TOTAL_ITEMS + 1)}
-if "checked" not in st.session_state:
-    st.session_state.checked = False
-if "results" not in st.session_state:
-    st.session_state.results = {}
+def new_state():
+    # answers[n - 1] is item n; results is a bitmask of correct items
+    return {"answers": [""] * TOTAL_ITEMS, "checked": False, "results": 0}
+
+state = exercise_state("A", new_state, derived=("checked", "results"))
 
 top = st.columns([1, 6, 1])
 with top[0]:
     if st.button("🔄 Reset", use_container_width=True):
-        st.session_state.answers = {i: "" for i in range(1, TOTAL_ITEMS + 1)}
-        st.session_state.checked = False
-        st.session_state.results = {}
+        reset_state("A", new_state)
         st.rerun()
 
 st.divider()
@@ -70,35 +38,35 @@ with st.form("quiz_form"):
     col_left, col_right = st.columns(2)
     for i in range(1, TOTAL_ITEMS + 1, 2):
         with col_left:
-            st.session_state.answers[i] = st.text_input(
+            state["answers"][i - 1] = st.text_input(
                 f"{i}. ❄️ Number {i}",
-                value=st.session_state.answers.get(i, ""),
+                value=state["answers"][i - 1],
                 key=f"ans_{i}"
             )
         j = i + 1
         if j <= TOTAL_ITEMS:
             with col_right:
-                st.session_state.answers[j] = st.text_input(
+                state["answers"][j - 1] = st.text_input(
                     f"{j}. ❄️ Number {j}",
-                    value=st.session_state.answers.get(j, ""),
+                    value=state["answers"][j - 1],
                     key=f"ans_{j}"
                 )
     submitted = st.form_submit_button("Check answers", use_container_width=True)
 
 if submitted:
-    st.session_state.results = {
-        n: is_correct(n, st.session_state.answers.get(n, "")) for n in range(1, TOTAL_ITEMS + 1)
-    }
-    st.session_state.checked = True
+    state["results"] = to_mask(is_correct(n, text) for n, text in enumerate(state["answers"], start=1))
+    state["checked"] = True
+    record_event("A", "check", "", dict(enumerate(state["answers"], start=1)))
+    record_section("A", "", dict(enumerate(state["answers"], start=1)))
     st.rerun()
 
-if st.session_state.checked:
-    correct_count = sum(1 for ok in st.session_state.results.values() if ok)
-    st.success(f"Score: **{correct_count} / {TOTAL_ITEMS}**")
+if state["checked"]:
+    results = from_mask(state["results"], TOTAL_ITEMS)
+    st.success(f"Score: **{sum(results)} / {TOTAL_ITEMS}**")
     rows = []
     for n in range(1, TOTAL_ITEMS + 1):
-        user = st.session_state.answers.get(n, "")
-        ok = st.session_state.results.get(n, False)
+        user = state["answers"][n - 1]
+        ok = results[n - 1]
         gold_display = ", ".join(ANSWER_KEY.get(n, [])) or "(not defined)"
         rows.append({
             "No.": n,
@@ -109,6 +77,8 @@ if st.session_state.checked:
     st.dataframe(rows, use_container_width=True, hide_index=True)
 
     if st.button("🧪 Try again", use_container_width=True):
-        st.session_state.checked = False
-        st.session_state.results = {}
+        state["checked"] = False
+        state["results"] = 0
         st.rerun()
+
+end_run()
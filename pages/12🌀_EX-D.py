@@ -1,10 +1,15 @@
 import streamlit as st
 from datetime import datetime
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from common.autosave import discard_draft, offer_resume, save_draft
+from common.chapter_report import record_section
+from common.exercises import D_FIELDS, D_LETTERS
+from common.images import diagram_d
+from common.instrument import begin_run, end_run
+from common.pdf_jobs import request_report, requested_report
+from common.state import exercise_state, reset_state
+from common.store import record_event
+
+begin_run("D")
 
 st.set_page_config(page_title="Ch1 Exercise D: Places of Articulation", layout="centered")
 
@@ -21,112 +26,101 @@ For each diagram (**a–g**), fill in:
 name = st.text_input("Enter your name: (In English)")
 
 
-# URLs of diagrams hosted on GitHub (replace with your actual GitHub raw links)
-image_urls = {
-    "a": "https://github.com/MK316/Phonetics-exercises/raw/main/pages/images/fig-16-a.png",
-    "b": "https://github.com/MK316/Phonetics-exercises/raw/main/pages/images/fig-16-b.png",
-    "c": "https://github.com/MK316/Phonetics-exercises/raw/main/pages/images/fig-16-c.png",
-    "d": "https://github.com/MK316/Phonetics-exercises/raw/main/pages/images/fig-16-d.png",
-    "e": "https://github.com/MK316/Phonetics-exercises/raw/main/pages/images/fig-16-e.png",
-    "f": "https://github.com/MK316/Phonetics-exercises/raw/main/pages/images/fig-16-f.png",
-    "g": "https://github.com/MK316/Phonetics-exercises/raw/main/pages/images/fig-16-g.png"
-}
+# Diagrams are bundled in pages/images and served from an in-process cache
+letters = D_LETTERS
+
+# --- Session state: [place, manner, example] per diagram, current diagram index,
+# and which answers a report was requested for ---
+def new_state():
+    return {"answers": [["", "", ""] for _ in letters], "index": 0, "export": None}
+
+state = exercise_state("D", new_state, derived=("export",))
+
+def as_responses(answers):
+    return {k: dict(zip(D_FIELDS, a)) for k, a in zip(letters, answers)}
+
+def clear_inputs():
+    for k in letters:
+        for field in D_FIELDS:
+            if f"{field}_{k}" in st.session_state:
+                del st.session_state[f"{field}_{k}"]
 
-letters = list(image_urls.keys())
+def resume(answers):
+    clear_inputs()
+    state["answers"] = answers
 
-# --- Session state ---
-if "responses_D" not in st.session_state:
-    st.session_state.responses_D = {k: {"place": "", "manner": "", "example": ""} for k in letters}
-if "d_index" not in st.session_state:
-    st.session_state.d_index = 0
+# --- Resume after a reload: the saved draft for this name, if any ---
+if not any(field for a in state["answers"] for field in a):
+    offer_resume("D", name, resume)
 
 # --- Navigation ---
 colA, colC = st.columns([1,1])
 with colA:
-    if st.button("⬅️ Previous", use_container_width=True, disabled=st.session_state.d_index == 0):
-        st.session_state.d_index = max(0, st.session_state.d_index - 1)
+    if st.button("⬅️ Previous", use_container_width=True, disabled=state["index"] == 0):
+        state["index"] = max(0, state["index"] - 1)
 with colC:
-    if st.button("Next ➡️", use_container_width=True, disabled=st.session_state.d_index == len(letters) - 1):
-        st.session_state.d_index = min(len(letters) - 1, st.session_state.d_index + 1)
+    if st.button("Next ➡️", use_container_width=True, disabled=state["index"] == len(letters) - 1):
+        state["index"] = min(len(letters) - 1, state["index"] + 1)
 
-letter = letters[st.session_state.d_index]
+letter = letters[state["index"]]
+current = state["answers"][state["index"]]
 st.markdown(f"#### Diagram ({letter})")
-st.image(image_urls[letter], caption=f"Figure 1.16 ({letter})", width=360)
+st.image(diagram_d(letter, 360), caption=f"Figure 1.16 ({letter})", width=360)
 
 # --- Inputs for this diagram ---
-st.session_state.responses_D[letter]["place"] = st.text_input(
+current[0] = st.text_input(
     "Place of articulation",
-    value=st.session_state.responses_D[letter]["place"],
+    value=current[0],
     key=f"place_{letter}",
 )
-st.session_state.responses_D[letter]["manner"] = st.text_input(
+current[1] = st.text_input(
     "Manner of articulation",
-    value=st.session_state.responses_D[letter]["manner"],
+    value=current[1],
     key=f"manner_{letter}",
 )
-st.session_state.responses_D[letter]["example"] = st.text_input(
+current[2] = st.text_input(
     "Example word (begins with this sound)",
-    value=st.session_state.responses_D[letter]["example"],
+    value=current[2],
     key=f"example_{letter}",
 )
 
+# D has no "Check": its chapter section and draft follow the answers once any is filled.
+# The section renders only when the chapter is built, not on every edit.
+if any(field for a in state["answers"] for field in a):
+    record_section("D", name, as_responses(state["answers"]), render=False)
+    save_draft("D", name, state["answers"])
+
 st.markdown("---")
 st.subheader("Summary (auto-saves)")
 summary_rows = [["Diagram", "Place", "Manner", "Example"]]
-for k in letters:
-    a = st.session_state.responses_D[k]
-    summary_rows.append([k, a["place"], a["manner"], a["example"]])
+for k, a in zip(letters, state["answers"]):
+    summary_rows.append([k, *a])
 
 st.table(summary_rows)
 
-# --- PDF generator ---
-def generate_pdf(name: str, responses: dict) -> bytes:
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-    elements.append(Paragraph("<b>Chapter 1 – Exercise D Report</b>", styles["Title"]))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph(f"Name: {name}", styles["Normal"]))
-    elements.append(Paragraph(f"Timestamp: {timestamp}", styles["Normal"]))
-    elements.append(Spacer(1, 12))
-
-    table_header = ["Diagram", "Place of Articulation", "Manner of Articulation", "Example Word"]
-    table_data = [table_header]
-    for k in letters:
-        ans = responses.get(k, {"place": "", "manner": "", "example": ""})
-        table_data.append([k, ans["place"], ans["manner"], ans["example"]])
-
-    tbl = Table(table_data, repeatRows=1)
-    tbl.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-    ]))
-    elements.append(tbl)
-
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer.getvalue()
-
 # --- PDF Export ---
 st.markdown("---")
 st.subheader("📄 Export Your Report")
 
 if not name:
     st.warning("Please enter your name to enable PDF download.")
+    st.button("📄 Prepare PDF", disabled=True)
 else:
-    pdf_bytes = generate_pdf(name, st.session_state.responses_D)
+    responses = as_responses(state["answers"])
+    if st.button("📄 Prepare PDF"):
+        request_report(state, "D", name, responses)
+    # Rendered in the background on request; typing again withdraws the request
+    pdf_bytes = requested_report(state, "D", name, responses)
     ts = datetime.now().strftime("%Y%m%d_%H%M")
     filename = f"ExerciseD_Report_{name.replace(' ', '_')}_{ts}.pdf"
 
-    if st.download_button("⬇️ Download PDF", data=pdf_bytes, file_name=filename, mime="application/pdf"):
+    if pdf_bytes is not None and st.download_button("⬇️ Download PDF", data=pdf_bytes, file_name=filename, mime="application/pdf"):
+        record_event("D", "export", name, responses)
         # Reset after download
-        for k in letters:
-            st.session_state.responses_D[k] = {"place": "", "manner": "", "example": ""}
-        st.session_state.d_index = 0
+        clear_inputs()
+        discard_draft("D", name)
+        reset_state("D", new_state)
         st.success("Report downloaded. The exercise has been reset.")
         st.rerun()
+
+end_run()
@@ -1,10 +1,15 @@
 import streamlit as st
 from datetime import datetime
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from common.autosave import offer_resume, save_draft
+from common.chapter_report import record_section
+from common.exercises import E_QUESTIONS as questions, E_OPTIONS as options
+from common.grading import e_feedback, grade_e
+from common.instrument import begin_run, end_run
+from common.pdf_jobs import request_report, requested_report
+from common.state import exercise_state, from_mask, selected_of, to_mask
+from common.store import record_event
+
+begin_run("E")
 
 st.set_page_config(page_title="Ch1 Exercise E: Phonetic Word Features", layout="wide")
 
@@ -15,123 +20,75 @@ st.markdown("Read each question carefully and check **all words that match the d
 
 name = st.text_input("Enter your name:")
 
-# -- Define Questions and Answer Keys
-questions = [
-    ("Circle the words that begin with a bilabial consonant.", ["met", "bet", "pet"]),
-    ("Circle the words that begin with a velar consonant.", ["got", "cot"]),
-    ("Circle the words that begin with a labiodental consonant.", ["fat", "vat"]),
-    ("Circle the words that begin with an alveolar consonant.", ["zip", "nip", "lip", "sip", "tip", "dip"]),
-    ("Circle the words that begin with a dental consonant.", ["thigh", "thy"]),
-    ("Circle the words that begin with a palato-alveolar consonant.", ["shy"]),
-    ("Circle the words that end with a fricative.", ["race", "wreath", "bush", "breathe", "rave", "rose", "rough"]),
-    ("Circle the words that end with a nasal.", ["rain", "rang", "dumb"]),
-    ("Circle the words that end with a stop.", ["lip", "crab", "dog", "hide", "back"]),
-    ("Circle the words that begin with a lateral.", ["lull"]),
-    ("Circle the words that begin with an approximant.", ["we", "you", "one", "run"]),
-    ("Circle the words that end with an affricate.", ["much", "edge"]),
-    ("Circle the words in which the consonant in the middle is voiced.", ["mother", "robber", "leisure", "stomach", "razor"]),
-    ("Circle the words that contain a high vowel.", ["weed", "suit", "meet"]),
-    ("Circle the words that contain a low vowel.", ["lad"]),
-    ("Circle the words that contain a front vowel.", ["gate", "cat", "kit"]),
-    ("Circle the words that contain a back vowel.", ["coop", "cop", "good"]),
-    ("Circle the words that contain a rounded vowel.", ["who"])
-]
-
-options = [
-    ["met", "net", "set", "bet", "let", "pet"],
-    ["knot", "got", "lot", "cot", "hot", "pot"],
-    ["fat", "cat", "mat", "chat", "vat"],
-    ["zip", "nip", "lip", "sip", "tip", "dip"],
-    ["pie", "guy", "shy", "thigh", "thy", "high"],
-    ["sigh", "shy", "tie", "thigh", "thy", "lie"],
-    ["race", "wreath", "bush", "bring", "breathe", "bang", "rave", "real", "ray", "rose", "rough"],
-    ["rain", "rang", "dumb", "deaf"],
-    ["pill", "lip", "graph", "crab", "dog", "hide", "laugh", "back"],
-    ["nut", "lull", "bar", "rob", "one"],
-    ["we", "you", "one", "run"],
-    ["much", "back", "edge", "ooze"],
-    ["tracking", "mother", "robber", "leisure", "massive", "stomach", "razor"],
-    ["sat", "suit", "got", "meet", "mud"],
-    ["weed", "wad", "load", "lad", "rude"],
-    ["gate", "caught", "cat", "kit", "put"],
-    ["maid", "weep", "coop", "cop", "good"],
-    ["who", "me", "us", "but", "him"]
-]
-
-# Session state for answers and feedback
-if "answers" not in st.session_state:
-    st.session_state.answers = [[] for _ in range(len(questions))]
-if "checked" not in st.session_state:
-    st.session_state.checked = False
-if "results" not in st.session_state:
-    st.session_state.results = []
-
-# UI for checkboxes
-st.subheader("📝 Questions")
-for i, (question_text, word_list) in enumerate(zip(questions, options)):
-    st.markdown(f"**{i+1}. {question_text[0]}**")
-    selected_words = []
+# Session state: one bitmask of ticked options per question, bitmask of correct questions
+# and the feedback line of each question at the last check
+state = exercise_state("E", lambda: {"masks": [0] * len(questions), "checked": False, "results": 0,
+                                     "feedback": [], "export": None},
+                       derived=("checked", "results", "feedback", "export"))
+
+def toggle(i, j):
+    """Flip one option bit when its checkbox changes.
+
+    A report requested for the old ticks is withdrawn; the fragment then
+    reruns the whole page so the download button goes away with it.
+    """
+    state["masks"][i] ^= 1 << j
+    save_draft("E", name, state["masks"])
+    if state["export"] is not None:
+        state["export"] = None
+        state["stale"] = True
+
+def resume(masks):
+    for i, word_list in enumerate(options):
+        for j in range(len(word_list)):
+            st.session_state.pop(f"q{i}_word{j}", None)
+    state["masks"] = masks
+
+# Resume after a reload: the saved draft for this name, if any
+if not any(state["masks"]):
+    offer_resume("E", name, resume)
+
+
+# Each question is its own fragment: a tick reruns only that question's row,
+# while Check Answers and export still trigger a full rerun.
+@st.fragment
+def question(i):
+    word_list = options[i]
+    st.markdown(f"**{i+1}. {questions[i][0]}**")
     cols = st.columns(len(word_list))
     for j, word in enumerate(word_list):
         with cols[j]:
-            if st.checkbox(word, key=f"q{i}_word{j}"):
-                selected_words.append(word)
-    st.session_state.answers[i] = selected_words
+            st.checkbox(
+                word,
+                value=bool(state["masks"][i] >> j & 1),
+                key=f"q{i}_word{j}",
+                on_change=toggle,
+                args=(i, j),
+            )
+    if state.pop("stale", False):
+        st.rerun(scope="app")
+
+
+# UI for checkboxes
+st.subheader("📝 Questions")
+for i in range(len(questions)):
+    question(i)
+
+answers = [selected_of(mask, word_list) for mask, word_list in zip(state["masks"], options)]
 
 # Answer checking
 if st.button("🔍 Check Answers"):
-    st.session_state.checked = True
-    st.session_state.results = []
-    for i, (question, correct) in enumerate(questions):
-        selected_set = set(st.session_state.answers[i])
-        correct_set = set(correct)
-        st.session_state.results.append("✅" if selected_set == correct_set else "❌")
+    state["checked"] = True
+    state["results"] = to_mask(grade_e(state["masks"]))
+    state["feedback"] = e_feedback(state["masks"])
+    record_event("E", "check", name, answers)
+    record_section("E", name, answers)
 
 # Display results
-if st.session_state.checked:
+if state["checked"]:
     st.subheader("✅ Feedback")
-    for i, result in enumerate(st.session_state.results):
-        st.markdown(f"**{i+1}. {result}** — {'Correct' if result == '✅' else 'Needs review'}")
-
-# PDF generation
-def generate_pdf(name, responses, results=None):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-
-    elements.append(Paragraph(f"<b>Chapter 1 – Exercise E Report</b>", styles['Title']))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph(f"Name: {name}", styles['Normal']))
-    elements.append(Paragraph(f"Timestamp: {timestamp}", styles['Normal']))
-    elements.append(Spacer(1, 12))
-
-    for i, (question, selected) in enumerate(zip(questions, st.session_state.answers)):
-        qtext = f"{i+1}. {question[0]}"
-        selected_text = ", ".join(selected) if selected else "(No selection)"
-
-        # Determine feedback level
-        correct_set = set(question[1])
-        selected_set = set(selected)
-        correct_selections = selected_set & correct_set
-
-        if selected_set == correct_set:
-            feedback_text = "Correct"
-        elif correct_selections:
-            feedback_text = " Partially correct"
-        else:
-            feedback_text = "(X) Incorrect"
-
-        elements.append(Paragraph(qtext, styles['Normal']))
-        elements.append(Paragraph(f"Selected: {selected_text}", styles['Normal']))
-        elements.append(Paragraph(f"Result: {feedback_text}", styles['Normal']))
-        elements.append(Spacer(1, 6))
-
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    for i, (ok, text) in enumerate(zip(from_mask(state["results"], len(questions)), state["feedback"])):
+        st.markdown(f"**{i+1}. {'✅' if ok else '❌'}** — {text}")
 
 # Download PDF
 st.markdown("---")
@@ -142,8 +99,14 @@ if not name:
     st.button("📄 Download My Report", disabled=True)
 else:
     if st.button("📄 Download My Report"):
-        pdf_bytes = generate_pdf(name, st.session_state.answers, st.session_state.results if st.session_state.checked else None)
+        request_report(state, "E", name, answers)
+        record_event("E", "export", name, answers)
+    # The report renders in the background; the download appears once it is ready.
+    # Changing the answers withdraws the request.
+    pdf_bytes = requested_report(state, "E", name, answers)
+    if pdf_bytes is not None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M")
         filename = f"ExerciseE_Report_{name.replace(' ', '_')}_{timestamp}.pdf"
         st.download_button("⬇️ Download PDF", data=pdf_bytes, file_name=filename, mime="application/pdf")
 
+end_run()
@@ -0,0 +1,44 @@
+import streamlit as st
+import pandas as pd
+from common.instrument import enabled, recent_runs, summarize
+from common.pdf_cache import CACHE
+from common.pdf_jobs import QUEUE
+
+st.set_page_config(page_title="Admin: rerun timings", layout="wide")
+
+st.title("🛠️ Admin – Rerun Timings")
+
+if not enabled():
+    st.info("Instrumentation is off. Start the server with `PHONETICS_INSTRUMENT=1` to record reruns.")
+    st.stop()
+
+if st.button("🔄 Refresh"):
+    st.rerun()
+
+# --- p50/p95 per page ---
+summary = pd.DataFrame(summarize())
+if summary.empty:
+    st.write("No reruns recorded yet.")
+else:
+    for col in summary.columns:
+        if col.startswith(("wall_s", "grading_s", "pdf_s")):
+            summary[col] = summary[col] * 1000
+    summary.columns = [c.replace("_s ", " ms ") for c in summary.columns]
+    st.markdown("### Per page (p50 / p95)")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+    st.caption("pdf: time the student waited for a report, counted on the rerun that "
+               "offers the download.")
+
+# --- PDF cache ---
+st.markdown("### PDF cache")
+st.write(f"{len(CACHE)} reports, {CACHE.size / 1024:.0f} KB, "
+         f"{CACHE.hits} hits / {CACHE.misses} misses")
+jobs = QUEUE.stats()
+st.write(f"Render queue: {jobs['pending']} in flight, {jobs['finished']} finished "
+         f"(kept {QUEUE.ttl:.0f} s)")
+
+# --- Latest reruns ---
+latest = sorted((r for runs in recent_runs().values() for r in runs), key=lambda r: r["ts"], reverse=True)[:50]
+if latest:
+    st.markdown("### Latest reruns")
+    st.dataframe(pd.DataFrame(latest), use_container_width=True, hide_index=True)
@@ -0,0 +1,75 @@
+import os
+import streamlit as st
+import pandas as pd
+from common.exercises import EXERCISE_IDS, TITLES
+from common.grading import cell_parts, item_labels
+from common.store import item_stats
+
+# Counters change on every check; the page re-reads them at most this often.
+STATS_TTL = 30
+
+st.set_page_config(page_title="Instructor: item analysis", layout="wide")
+
+st.title("📊 Instructor – Item Analysis")
+
+path = os.environ.get("PHONETICS_DB")
+if not path or not os.path.exists(path):
+    st.info("No submissions yet. Start the server with `PHONETICS_DB=submissions.db` to log every check.")
+    st.stop()
+
+
+@st.cache_data(ttl=STATS_TTL, show_spinner=False)
+def load_stats(path):
+    stats = pd.DataFrame(item_stats(path), columns=["exercise", "item", "part", "checks", "wrong"])
+    stats["error_rate"] = stats["wrong"] / stats["checks"]
+    return stats
+
+
+if st.button("🔄 Refresh"):
+    load_stats.clear()
+    st.rerun()
+
+stats = load_stats(path)
+st.caption(f"Every check counts, re-checks included. Figures are at most {STATS_TTL} s old.")
+if stats.empty:
+    st.write("No checks recorded yet.")
+    st.stop()
+
+rate = st.column_config.ProgressColumn("Error rate", format="percent", min_value=0, max_value=1)
+
+# --- Overview: one row per exercise ---
+overview = stats.groupby("exercise").agg(checks=("checks", "max"), error_rate=("error_rate", "mean"))
+overview = overview.reindex([ex for ex in EXERCISE_IDS if ex in overview.index])
+overview.insert(0, "title", [TITLES[ex] for ex in overview.index])
+st.markdown("### Exercises")
+st.dataframe(overview, use_container_width=True,
+             column_config={"title": "Title", "checks": "Checks", "error_rate": rate})
+
+# --- One exercise, item by item ---
+exercise = st.selectbox("Exercise", list(overview.index),
+                        format_func=lambda ex: f"{ex} – {TITLES[ex]}")
+rows = stats[stats["exercise"] == exercise]
+parts = cell_parts(exercise)
+order = [item for item in item_labels(exercise) if item in set(rows["item"])]
+
+if len(parts) > 1:
+    # B-C and F: which feature of which item the class gets wrong
+    st.markdown("### Error rate per cell")
+    grid = rows.pivot(index="item", columns="part", values="error_rate").reindex(
+        index=order, columns=list(parts))
+    st.dataframe(grid, use_container_width=True,
+                 column_config={p: st.column_config.ProgressColumn(
+                     p, format="percent", min_value=0, max_value=1) for p in parts})
+
+    per_feature = rows.groupby("part")["error_rate"].mean().reindex(list(parts))
+    st.markdown("### Error rate per feature")
+    st.dataframe(per_feature.rename("error_rate").to_frame(), use_container_width=True,
+                 column_config={"error_rate": rate})
+
+st.markdown("### Hardest items" if len(parts) == 1 else "### Hardest cells")
+hardest = rows.sort_values(["error_rate", "checks"], ascending=False)
+columns = ["item", "checks", "wrong", "error_rate"] if len(parts) == 1 else \
+    ["item", "part", "checks", "wrong", "error_rate"]
+st.dataframe(hardest[columns], use_container_width=True, hide_index=True,
+             column_config={"item": "Item", "part": "Feature", "checks": "Checks",
+                            "wrong": "Wrong", "error_rate": rate})
@@ -0,0 +1 @@
+"""Command-line tools for the Chapter 1 exercises (run from the repo root)."""
@@ -0,0 +1,128 @@
+"""Render PDF reports for a whole class from a JSONL file of submissions.
+
+Each line is one student's answers to one exercise::
+
+    {"name": "Kim Minji", "exercise": "K", "answers": {"1. laugh": 3, ...}}
+
+``answers`` uses the same shape as the pages (see common/exercise_reports.py).
+Reports are rendered on a process pool and streamed into a zip (one PDF per
+line) or, with ``--merge``, a single PDF.  The zip keeps memory flat; a
+merged PDF holds every page until it is written, so for a large class pass
+``--merge-size N`` to write a new file (``class-001.pdf``, ...) every N
+reports.
+
+    python -m tools.batch_reports submissions.jsonl -o class_reports.zip
+    python -m tools.batch_reports submissions.jsonl -o class.pdf --merge
+    python -m tools.batch_reports submissions.jsonl -o class.pdf --merge --merge-size 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from common.exercise_reports import RENDERERS
+from common.report import report_timestamp
+
+
+def read_submissions(path):
+    """Yield ``(line_no, submission)`` without loading the file into memory."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            sub = json.loads(line)
+            if sub.get("exercise") not in RENDERERS:
+                raise ValueError(f"line {line_no}: unknown exercise {sub.get('exercise')!r}")
+            yield line_no, sub
+
+
+def render_submission(job):
+    line_no, sub, timestamp = job
+    render = RENDERERS[sub["exercise"]]
+    return line_no, sub, render(sub.get("name", ""), sub.get("answers") or {}, timestamp=timestamp)
+
+
+def report_filename(line_no, sub):
+    name = (sub.get("name") or "anonymous").replace(" ", "_").replace("/", "_")
+    return f"{line_no:05d}_Exercise{sub['exercise']}_{name}.pdf"
+
+
+def bounded_map(pool, fn, jobs, window):
+    """Like ``pool.map`` but keeps at most ``window`` jobs in flight.
+
+    ``Executor.map`` submits the whole iterable up front, which would hold
+    every pending submission (and its result) in memory at once.
+    """
+    pending = []
+    for job in jobs:
+        pending.append(pool.submit(fn, job))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for fut in pending:
+        yield fut.result()
+
+
+def part_path(path, part):
+    root, ext = os.path.splitext(path)
+    return f"{root}-{part:03d}{ext or '.pdf'}"
+
+
+def write_merged(results, path, size=0) -> int:
+    """Merge rendered reports into ``path``, or into parts of ``size`` reports."""
+    from pypdf import PdfReader, PdfWriter
+    count, part, writer = 0, 0, None
+    for line_no, sub, pdf in results:
+        if writer is None:
+            writer, part = PdfWriter(), part + 1
+        # Only the page objects are kept; the rendered bytes are dropped.
+        writer.append(PdfReader(BytesIO(pdf)))
+        count += 1
+        if size and count % size == 0:
+            with open(part_path(path, part), "wb") as f:
+                writer.write(f)
+            writer = None
+    if writer is not None or not count:
+        with open(part_path(path, part) if size else path, "wb") as f:
+            (writer or PdfWriter()).write(f)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("submissions", help="JSONL file, one submission per line")
+    parser.add_argument("-o", "--output", required=True, help="output .zip (or .pdf with --merge)")
+    parser.add_argument("--merge", action="store_true", help="write one merged PDF instead of a zip")
+    parser.add_argument("--merge-size", type=int, default=0, metavar="N",
+                        help="with --merge, start a new PDF every N reports; a single merged "
+                             "PDF keeps every page in memory until it is written")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    timestamp = report_timestamp()
+    jobs = ((line_no, sub, timestamp) for line_no, sub in read_submissions(args.submissions))
+
+    count = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = bounded_map(pool, render_submission, jobs, window=4 * args.workers)
+        if args.merge:
+            count = write_merged(results, args.output, args.merge_size)
+        else:
+            with zipfile.ZipFile(args.output, "w", zipfile.ZIP_DEFLATED) as zf:
+                for line_no, sub, pdf in results:
+                    zf.writestr(report_filename(line_no, sub), pdf)
+                    count += 1
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else 0.0
+    print(f"{count} reports in {elapsed:.2f}s ({rate:.1f} PDFs/s) -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Benchmarks for page reruns and PDF report rendering.
+
+Each page is driven through Streamlit's ``AppTest`` harness with scripted
+inputs.  ``cold`` is the first run of the page in a fresh interpreter
+(imports, key compilation, image decoding included); ``rerun`` is the latency
+of one scripted interaction on an already-loaded session.  Every report
+renderer is timed separately on realistic answers, bypassing the PDF cache.
+Results are written as JSON so runs can be compared.
+
+    python -m tools.bench -o bench_results.json
+    python -m tools.bench --pages E,F --reruns 50
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = {
+    "A": "10🌀_EX_A.py",
+    "BC": "11🌀_EX-BC.py",
+    "D": "12🌀_EX-D.py",
+    "E": "12🌀_EX-E.py",
+    "F": "13🌀_EX-F.py",
+    "K": "14🌀_EX_K.py",
+    "L": "15🌀_EX_L.py",
+}
+
+
+def page_path(exercise: str) -> str:
+    return str(ROOT / "pages" / PAGES[exercise])
+
+
+def _button(at, label):
+    return next(b for b in at.button if label in b.label)
+
+
+# ---------------- Scripted interactions ----------------
+# ``setup`` runs once on a fresh session; ``step(at, i)`` changes one input
+# (and sometimes presses a button) and reruns the script.
+def _setup_name(at):
+    at.text_input[0].input("Benchmark Student").run()
+
+
+def _step_a(at, i):
+    n = i % 14 + 1
+    at.text_input(key=f"ans_{n}").set_value("upper lip" if i % 2 else "velum")
+    _button(at, "Check answers").click().run()
+
+
+def _step_bc(at, i):
+    _button(at, "Check My Work").click().run()
+
+
+def _step_d(at, i):
+    letter = "a"
+    at.text_input(key=f"place_{letter}").input(f"bilabial {i}").run()
+
+
+def _step_e(at, i):
+    box = at.checkbox(key=f"q{i % 18}_word0")
+    (box.uncheck() if box.value else box.check()).run()
+
+
+def _step_f(at, i):
+    # AppTest cannot edit data_editor cells, so each step is a check rerun.
+    _button(at, "Check My Work").click().run()
+
+
+def _step_k(at, i):
+    from common.exercises import K_WORDS
+    # Radios sit in a form, so a step is one selection plus its submit.
+    at.radio(key=f"radio_{K_WORDS[i % len(K_WORDS)]}").set_value(1 + i % 7)
+    at.button(key="check_button").click().run()
+
+
+def _step_l(at, i):
+    from common.exercises import L_OPTIONS
+    q = list(L_OPTIONS)[i % len(L_OPTIONS)]
+    at.radio(key=f"L_{q}").set_value(L_OPTIONS[q][i % 5])
+    at.button(key="check_button_L").click().run()
+
+
+SCRIPTS = {
+    "A": (None, _step_a),
+    "BC": (_setup_name, _step_bc),
+    "D": (_setup_name, _step_d),
+    "E": (_setup_name, _step_e),
+    "F": (_setup_name, _step_f),
+    "K": (_setup_name, _step_k),
+    "L": (_setup_name, _step_l),
+}
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "mean_s": statistics.fmean(samples),
+        "p50_s": samples[len(samples) // 2],
+        "p95_s": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_s": samples[0],
+    }
+
+
+def _new_app(exercise):
+    from streamlit import logger
+    from streamlit.testing.v1 import AppTest
+    # Deprecation and bare-mode warnings would otherwise flood stderr.
+    logger.set_log_level("error")
+    return AppTest.from_file(page_path(exercise), default_timeout=60)
+
+
+def cold_load(exercise: str) -> float:
+    """First run of the page in a fresh interpreter."""
+    out = subprocess.run(
+        [sys.executable, "-m", "tools.bench", "--cold-child", exercise],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _cold_child(exercise: str):
+    sys.path.insert(0, str(ROOT))
+    at = _new_app(exercise)
+    start = time.perf_counter()
+    at.run()
+    print(time.perf_counter() - start)
+
+
+def bench_page(exercise: str, reruns: int) -> dict:
+    setup, step = SCRIPTS[exercise]
+    at = _new_app(exercise)
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    if setup:
+        setup(at)
+    samples = []
+    for i in range(reruns):
+        start = time.perf_counter()
+        step(at, i)
+        samples.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(f"page {exercise} raised: {at.exception[0].message}")
+    return {"cold_s": cold_load(exercise), "first_session_s": first, "rerun": _summary(samples)}
+
+
+def bench_pdf(exercise: str, iterations: int) -> dict:
+    from common.exercise_reports import RENDERERS
+    from common.samples import sample_answers
+    render = RENDERERS[exercise]
+    answers = [sample_answers(exercise, seed) for seed in range(iterations)]
+    start = time.perf_counter()
+    render("Benchmark Student", answers[0])
+    first = time.perf_counter() - start
+    samples, size = [], 0
+    for a in answers:
+        start = time.perf_counter()
+        size = len(render("Benchmark Student", a))
+        samples.append(time.perf_counter() - start)
+    return {"first_s": first, "bytes": size, **_summary(samples)}
+
+
+def _metadata() -> dict:
+    import reportlab
+    import streamlit
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": rev,
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "reportlab": reportlab.Version,
+        "machine": platform.machine(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--pages", default=",".join(PAGES), help="comma-separated exercise ids")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--pdf-iterations", type=int, default=30)
+    parser.add_argument("--skip-pages", action="store_true", help="only benchmark PDF rendering")
+    parser.add_argument("--cold-child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.cold_child:
+        _cold_child(args.cold_child)
+        return 0
+
+    from common.exercise_reports import RENDERERS
+    selected = [p.strip() for p in args.pages.split(",") if p.strip()]
+    results = {"meta": _metadata(), "pages": {}, "pdf": {}}
+    if not args.skip_pages:
+        for ex in selected:
+            results["pages"][ex] = r = bench_page(ex, args.reruns)
+            print(f"page {ex:>2}: cold {r['cold_s'] * 1000:7.1f} ms, "
+                  f"rerun p50 {r['rerun']['p50_s'] * 1000:6.1f} ms, "
+                  f"p95 {r['rerun']['p95_s'] * 1000:6.1f} ms", file=sys.stderr)
+    for ex in selected:
+        if ex in RENDERERS:
+            results["pdf"][ex] = r = bench_pdf(ex, args.pdf_iterations)
+            print(f"pdf  {ex:>2}: mean {r['mean_s'] * 1000:6.2f} ms, "
+                  f"p95 {r['p95_s'] * 1000:6.2f} ms, {r['bytes']} bytes", file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
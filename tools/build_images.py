@@ -0,0 +1,29 @@
+"""Pre-rasterize Figure 1.15 (Exercise A) from the bundled PDF.
+
+Writes ``pages/images/vocal_organ-<dpi>dpi.{webp,png}`` for every DPI in
+``common.images.VOCAL_ORGAN_DPIS``.  The page falls back to rasterizing on
+first use when these files are missing, so running this is optional; it just
+moves that work to deploy time.
+
+    python -m tools.build_images
+"""
+import sys
+
+from common.images import (
+    IMAGE_DIR, VOCAL_ORGAN_DPIS, VOCAL_ORGAN_FORMATS,
+    rasterize_vocal_organ, vocal_organ_filename, vocal_organ_width,
+)
+
+
+def main():
+    for dpi in VOCAL_ORGAN_DPIS:
+        for fmt in VOCAL_ORGAN_FORMATS:
+            data = rasterize_vocal_organ(dpi, fmt)
+            path = IMAGE_DIR / vocal_organ_filename(dpi, fmt)
+            path.write_bytes(data)
+            print(f"{path.name}: {vocal_organ_width(dpi)}px, {len(data) // 1024} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
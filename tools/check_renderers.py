@@ -0,0 +1,85 @@
+"""Check that the canvas and platypus report engines print the same text.
+
+For every exercise and a range of sample answer sets, both engines render the
+report with the same name and timestamp; the text pypdf extracts from the two
+PDFs must match word for word. Per-report render time of each engine is
+printed alongside. Exits non-zero on any mismatch.
+
+    python -m tools.check_renderers --samples 20
+"""
+import argparse
+import sys
+import time
+from io import BytesIO
+
+from pypdf import PdfReader
+
+from common.exercise_reports import RENDERERS
+from common.samples import sample_answers
+
+ENGINES = ("platypus", "canvas")
+NAME = "Golden Student"
+TIMESTAMP = "2025-01-01 09:00"
+
+
+def pdf_words(data: bytes) -> list:
+    """Words of every page, in reading order; line breaks and spacing ignored."""
+    reader = PdfReader(BytesIO(data))
+    return " ".join(page.extract_text() for page in reader.pages).split()
+
+
+def render_timed(exercise: str, answers, engine: str):
+    start = time.perf_counter()
+    data = RENDERERS[exercise](NAME, answers, timestamp=TIMESTAMP, engine=engine)
+    return data, time.perf_counter() - start
+
+
+def check(exercise: str, samples: int):
+    """``(mismatches, {engine: mean seconds per report})`` for one exercise."""
+    mismatches, elapsed = [], dict.fromkeys(ENGINES, 0.0)
+    for seed in range(samples):
+        answers = sample_answers(exercise, seed)
+        words = {}
+        for engine in ENGINES:
+            data, seconds = render_timed(exercise, answers, engine)
+            elapsed[engine] += seconds
+            words[engine] = pdf_words(data)
+        if words["platypus"] != words["canvas"]:
+            mismatches.append((seed, words["platypus"], words["canvas"]))
+    return mismatches, {engine: total / samples for engine, total in elapsed.items()}
+
+
+def _first_difference(a: list, b: list) -> str:
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return f"word {i}: platypus {' '.join(a[i:i + 6])!r} / canvas {' '.join(b[i:i + 6])!r}"
+    return f"lengths differ: platypus {len(a)} words, canvas {len(b)} words"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=10, help="answer sets per exercise")
+    parser.add_argument("--exercise", action="append", choices=sorted(RENDERERS),
+                        help="only these exercises (repeatable)")
+    args = parser.parse_args(argv)
+
+    # Warm both engines (fonts, stylesheet, grading tables) before timing.
+    for exercise in RENDERERS:
+        for engine in ENGINES:
+            render_timed(exercise, sample_answers(exercise), engine)
+
+    failed = False
+    for exercise in args.exercise or RENDERERS:
+        mismatches, mean = check(exercise, args.samples)
+        speedup = mean["platypus"] / mean["canvas"] if mean["canvas"] else float("inf")
+        status = "ok" if not mismatches else f"{len(mismatches)} MISMATCH"
+        print(f"{exercise:>2}: {status:<12} platypus {mean['platypus'] * 1000:6.2f} ms, "
+              f"canvas {mean['canvas'] * 1000:6.2f} ms ({speedup:.1f}x)")
+        for seed, a, b in mismatches[:3]:
+            print(f"    seed {seed}: {_first_difference(a, b)}")
+        failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
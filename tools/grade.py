@@ -0,0 +1,136 @@
+"""Grade a JSONL file of submissions across all Chapter 1 exercises.
+
+Each line is ``{"name": ..., "exercise": "A"|"BC"|"D"|"E"|"F"|"K"|"L",
+"answers": ...}`` (answer shapes: see common/grading.py).  Lines are graded in
+chunks on a process pool and streamed out, so memory stays flat however long
+the file is.  Output is CSV, or Parquet when the file name ends in
+``.parquet``.
+
+    python -m tools.grade semester.jsonl -o scores.csv --items items.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from common.grading import GRADERS, grade_many, item_labels
+from tools.batch_reports import bounded_map
+
+SCORE_COLUMNS = ["line", "name", "exercise", "score", "total"]
+ITEM_COLUMNS = ["line", "name", "exercise", "item", "correct"]
+
+
+def read_chunks(path, size):
+    """Yield lists of ``(line_no, raw_line)``; parsing happens in the workers."""
+    with open(path, encoding="utf-8") as f:
+        numbered = ((n, line) for n, line in enumerate(f, start=1) if line.strip())
+        while True:
+            chunk = list(islice(numbered, size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def grade_chunk(chunk):
+    """Grade a chunk exercise by exercise (E as one array), output in line order."""
+    subs = []
+    for line_no, line in chunk:
+        sub = json.loads(line)
+        if sub.get("exercise") not in GRADERS:
+            raise ValueError(f"line {line_no}: unknown exercise {sub.get('exercise')!r}")
+        subs.append((line_no, sub))
+    results = {}
+    for exercise in dict.fromkeys(sub["exercise"] for _, sub in subs):
+        group = [(n, sub) for n, sub in subs if sub["exercise"] == exercise]
+        graded = grade_many(exercise, [sub.get("answers") or {} for _, sub in group])
+        results.update((n, row.tolist()) for (n, _), row in zip(group, graded))
+
+    scores, items = [], []
+    for line_no, sub in subs:
+        exercise, name = sub["exercise"], sub.get("name", "")
+        row = results[line_no]
+        scores.append([line_no, name, exercise, sum(row), len(row)])
+        items.extend([line_no, name, exercise, label, int(ok)]
+                     for label, ok in zip(item_labels(exercise), row))
+    return scores, items
+
+
+class CsvSink:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """One row group per chunk; needs pyarrow (installed with streamlit)."""
+
+    def __init__(self, path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        types = {"line": pa.int64(), "score": pa.int32(), "total": pa.int32(), "correct": pa.int8()}
+        self._pa = pa
+        self._schema = pa.schema([(c, types.get(c, pa.string())) for c in columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        if rows:
+            columns = list(zip(*rows))
+            self._writer.write_table(self._pa.Table.from_arrays(
+                [self._pa.array(col, type=field.type) for col, field in zip(columns, self._schema)],
+                schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_sink(path, columns):
+    if path.endswith(".parquet"):
+        return ParquetSink(path, columns)
+    return CsvSink(path, columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("submissions", help="JSONL file, one submission per line")
+    parser.add_argument("-o", "--output", required=True, help="per-submission scores (.csv or .parquet)")
+    parser.add_argument("--items", help="optional per-item results (.csv or .parquet)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    scores_out = open_sink(args.output, SCORE_COLUMNS)
+    items_out = open_sink(args.items, ITEM_COLUMNS) if args.items else None
+    count = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            chunks = read_chunks(args.submissions, args.chunk_size)
+            for scores, items in bounded_map(pool, grade_chunk, chunks, window=2 * args.workers):
+                scores_out.write(scores)
+                if items_out:
+                    items_out.write(items)
+                count += len(scores)
+    finally:
+        scores_out.close()
+        if items_out:
+            items_out.close()
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else 0.0
+    print(f"graded {count} submissions in {elapsed:.2f}s ({rate:.0f}/s) -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
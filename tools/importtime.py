@@ -0,0 +1,130 @@
+"""Import-time report for the pages' top-level imports.
+
+For each page, a fresh interpreter run with ``-X importtime`` first imports
+Streamlit (the baseline), then every import at the top of the page, its own
+third-party ones and the shared ``common.*`` modules alike. Everything
+imported after the baseline is what the page costs on a cold start. Heavy
+libraries (pandas, numpy, pyarrow, pypdf and ReportLab's drawing modules)
+loaded at that point mean a module lost its lazy import, and are reported
+as failures, unless ``ALLOWED`` lists them for that page: the B-C and F
+grids are pandas DataFrames from the first run. What an allowed library
+imports in turn is allowed with it, and its time is reported apart from
+the budget.
+
+    python -m tools.importtime
+    python -m tools.importtime --pages K,L --budget-ms 150 --top 10
+"""
+import argparse
+import ast
+import subprocess
+import sys
+
+from tools.bench import PAGES, ROOT, page_path
+
+# ``reportlab`` itself and ``reportlab.lib.pagesizes`` are plain constants.
+HEAVY = ("pandas", "numpy", "pyarrow", "pypdf", "reportlab.platypus", "reportlab.pdfgen",
+         "reportlab.pdfbase", "reportlab.lib.colors", "reportlab.lib.styles")
+# Heavy libraries a page really needs when it first runs.
+ALLOWED = {
+    "BC": ("pandas",),
+    "F": ("pandas",),
+}
+MARK = "__importtime_mark__"
+
+
+def page_imports(exercise: str) -> list:
+    """Import statements at the top of a page."""
+    with open(page_path(exercise), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def _matches(name: str, packages) -> bool:
+    return any(name == p or name.startswith(p + ".") for p in packages)
+
+
+def measure(statements_before, statements) -> list:
+    """``(self_us, cumulative_us, depth, module)`` for every import after the baseline."""
+    code = "\n".join([*statements_before, f"import sys; sys.stderr.write({MARK!r} + '\\n')",
+                      *statements])
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    lines = proc.stderr.split(MARK + "\n", 1)[1].splitlines()
+    entries = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def report(exercise: str) -> dict:
+    allowed = ALLOWED.get(exercise, ())
+    entries = measure(["import streamlit"], page_imports(exercise))
+    top_depth = min((depth for _, _, depth, _ in entries), default=0)
+    # -X importtime lists a module after everything it imported; walking the
+    # list backwards, an allowed module's subtree follows it, one level deeper.
+    counted, heavy, allowed_us = [], set(), 0
+    allowed_depth = None
+    for entry in reversed(entries):
+        self_us, cumulative_us, depth, name = entry
+        if allowed_depth is not None and depth <= allowed_depth:
+            allowed_depth = None
+        if allowed_depth is not None:
+            continue
+        if _matches(name, allowed):
+            allowed_depth = depth
+            allowed_us += cumulative_us if depth == top_depth else self_us
+            continue
+        if _matches(name, HEAVY):
+            heavy.add(name)
+        counted.append(entry)
+    return {
+        "total_ms": sum(cum for _, cum, depth, _ in counted if depth == top_depth) / 1000,
+        "allowed_ms": allowed_us / 1000,
+        "allowed": allowed,
+        "modules": len(entries),
+        "heavy": sorted(heavy),
+        "slowest": sorted(((self_us / 1000, name) for self_us, _, _, name in counted),
+                          reverse=True),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default=",".join(PAGES),
+                        help="comma-separated exercise ids (default: all)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail when a page's imports, less the allowed ones, take longer")
+    parser.add_argument("--top", type=int, default=5, help="slowest modules to list per page")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for exercise in args.pages.split(","):
+        result = report(exercise)
+        over = args.budget_ms is not None and result["total_ms"] > args.budget_ms
+        status = "ok"
+        if result["heavy"]:
+            status = "HEAVY"
+        elif over:
+            status = "OVER BUDGET"
+        allowed = (f" (+ {result['allowed_ms']:.1f} ms {', '.join(result['allowed'])})"
+                   if result["allowed"] else "")
+        print(f"{exercise:>2}: {status:<11} {result['total_ms']:7.1f} ms, "
+              f"{result['modules']:4d} modules{allowed}")
+        if result["heavy"]:
+            print(f"    eager heavy imports: {', '.join(result['heavy'][:8])}"
+                  + (" ..." if len(result["heavy"]) > 8 else ""))
+        for ms, name in result["slowest"][:args.top]:
+            print(f"    {ms:7.2f} ms  {name}")
+        failed = failed or bool(result["heavy"]) or over
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
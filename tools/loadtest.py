@@ -0,0 +1,400 @@
+"""Concurrent-session load test over Streamlit's websocket protocol.
+
+Starts ``streamlit run HOME.py`` on a free local port, then for each session
+count N opens N websocket sessions at once. Every session behaves like a
+student: it opens the home page, fills in and checks the Exercise A form,
+ticks the Exercise E checkboxes, fills the Exercise F grid cell by cell and
+checks it, and in K and L picks every answer, checks, waits for the PDF,
+downloads it and presses the download button. Answers come from
+``common.samples``.
+
+Latency is measured per interaction, from sending the rerun to the server's
+``script_finished``; ``K pdf``/``L pdf`` is the wait from the check until the
+download button appears. Server CPU (in % of one core) and RSS are sampled from
+``/proc`` for the server and its PDF workers together, so this runs on Linux.
+
+    python -m tools.loadtest --sessions 1,5,10,20
+    python -m tools.loadtest --sessions 10 --rounds 3 --think 0 -o load_results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+from tools.bench import PAGES, ROOT, _metadata
+
+ACTIONS = ("A check", "E tick", "F edit", "F check",
+           "K check", "K pdf", "K export", "L check", "L pdf", "L export")
+VALUE_FIELDS = {"text_input": "string_value", "checkbox": "bool_value",
+                "radio": "string_value", "dataframe": "string_value"}
+TRIGGERS = ("button", "download_button")
+
+
+# ---------------- Server ----------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "HOME.py", "--server.headless", "true",
+         "--server.port", str(port), "--server.address", "127.0.0.1",
+         "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("streamlit exited during startup")
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit did not become healthy within 60 s")
+
+
+def _process_tree(pid: int) -> list:
+    """``pid`` and all its descendants (the PDF workers and their tracker)."""
+    parents = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            parents[int(stat.rsplit(")", 1)[1].split()[1])].append(int(entry))
+    tree, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        tree.append(p)
+        todo.extend(parents.get(p, ()))
+    return tree
+
+
+def _usage(pid: int):
+    """``(cpu seconds, rss bytes)`` summed over the process tree."""
+    ticks, rss = os.sysconf("SC_CLK_TCK"), 0
+    cpu = 0.0
+    for p in _process_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{p}/statm") as f:
+                rss += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / ticks
+    return cpu, rss
+
+
+class Monitor:
+    """Samples server CPU and RSS while a load level runs."""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+
+    async def run(self):
+        while True:
+            self.peak_rss = max(self.peak_rss, _usage(self.pid)[1])
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self.start = time.monotonic(), _usage(self.pid)[0]
+        self.task = asyncio.ensure_future(self.run())
+        return self
+
+    def __exit__(self, *exc):
+        self.task.cancel()
+        wall, cpu = time.monotonic() - self.start[0], _usage(self.pid)[0] - self.start[1]
+        self.cpu_percent = 100 * cpu / wall if wall else 0.0
+
+
+# ---------------- One simulated browser ----------------
+class Session:
+    """A websocket session that keeps widget state the way the frontend does."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.pages = {}  # url pathname -> page script hash
+        self.page_hash = ""
+        self.widgets = {}  # user key or label -> (element type, widget proto, fragment id)
+        self.values = {}  # widget id -> WidgetState
+        self.auto_rerun = None  # (interval, fragment id) of a polling fragment
+        self.errors = 0
+        self.first_error = None
+
+    async def __aenter__(self):
+        import websockets
+        self.ws = await websockets.connect(f"ws://127.0.0.1:{self.port}/_stcore/stream",
+                                           subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+    async def rerun(self, page_hash="", trigger=None, fragment_id="", auto=False) -> float:
+        """Send one rerun with the current widget values; seconds until it finished."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        msg = BackMsg()
+        client = msg.rerun_script
+        client.page_script_hash = page_hash or self.page_hash
+        client.fragment_id = fragment_id
+        client.is_auto_rerun = auto
+        client.widget_states.widgets.extend(self.values.values())
+        if trigger is not None:
+            state = client.widget_states.widgets.add()
+            state.id = trigger
+            state.trigger_value = True
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await self._until_finished()
+        return time.perf_counter() - start
+
+    async def _until_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "navigation":
+                self.pages = {p.url_pathname: p.page_script_hash for p in msg.navigation.app_pages}
+                self.page_hash = msg.navigation.page_script_hash
+            elif kind == "new_session" and not msg.new_session.fragment_ids_this_run:
+                self.widgets, self.auto_rerun = {}, None
+            elif kind == "auto_rerun":
+                self.auto_rerun = (msg.auto_rerun.interval, msg.auto_rerun.fragment_id)
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                self._element(msg.delta.new_element, msg.delta.fragment_id)
+            elif kind == "script_finished":
+                if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+    def _element(self, element, fragment_id):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors += 1
+            self.first_error = self.first_error or element.exception.message
+        elif kind in VALUE_FIELDS or kind in TRIGGERS:
+            widget = getattr(element, kind)
+            if widget.id:
+                key = widget.id.rsplit("-", 1)[1]
+                self.widgets[widget.label if key == "None" else key] = (kind, widget, fragment_id)
+
+    def widget(self, name: str):
+        """``(element type, widget, fragment id)`` by user key, or by label prefix."""
+        if name in self.widgets:
+            return self.widgets[name]
+        for found in self.widgets.values():
+            if getattr(found[1], "label", "").lstrip("🔍📄⬇️ ").startswith(name):
+                return found
+        raise LookupError(f"no widget {name!r} on the page")
+
+    def set(self, name: str, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        kind, widget, fragment_id = self.widget(name)
+        state = WidgetState(id=widget.id)
+        setattr(state, VALUE_FIELDS[kind], value)
+        self.values[widget.id] = state
+        return fragment_id
+
+    async def change(self, name: str, value) -> float:
+        """Change a widget outside any form, which reruns the page (or its fragment)."""
+        fragment_id = self.set(name, value)
+        return await self.rerun(fragment_id=fragment_id)
+
+    async def click(self, name: str) -> float:
+        _, widget, fragment_id = self.widget(name)
+        return await self.rerun(trigger=widget.id, fragment_id=fragment_id)
+
+    async def open(self, exercise: str) -> float:
+        stem = PAGES[exercise][:-3]
+        page_hash = next(h for path, h in self.pages.items() if path and stem.endswith(path))
+        self.values = {}
+        return await self.rerun(page_hash=page_hash)
+
+    async def wait_for_download(self, label: str) -> float:
+        """Poll the page's auto-rerun fragment until the download button shows up."""
+        start = time.perf_counter()
+        while not any(kind == "download_button" for kind, _, _ in self.widgets.values()):
+            if self.auto_rerun is None:
+                raise LookupError(f"no {label} download and nothing pending")
+            interval, fragment_id = self.auto_rerun
+            await asyncio.sleep(interval)
+            await self.rerun(fragment_id=fragment_id, auto=True)
+        return time.perf_counter() - start
+
+    def fetch(self, label: str) -> int:
+        _, widget, _ = self.widget(label)
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.port}{widget.url}", timeout=30) as r:
+            return len(r.read())
+
+
+# ---------------- A student working through the chapter ----------------
+async def student(port: int, index: int, rounds: int, think: float, record):
+    from common.exercises import E_OPTIONS, F_EXAMPLE, F_WORDS, K_WORDS, L_OPTIONS
+    from common.samples import sample_answers
+
+    rng = random.Random(index)
+    name = f"Load Student {index}"
+
+    async def pause():
+        if think:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+
+    async with Session(port) as s:
+        await s.rerun()
+        for r in range(rounds):
+            seed = index * rounds + r
+
+            await s.open("A")
+            # A's inputs sit in a form: typing is sent with the submit.
+            for n, text in sample_answers("A", seed).items():
+                s.set(f"ans_{n}", text)
+                await pause()
+            record("A check", await s.click("Check answers"))
+
+            await s.open("E")
+            await s.change("Enter your name", name)
+            for i, picked in enumerate(sample_answers("E", seed)):
+                for word in picked:
+                    record("E tick", await s.change(f"q{i}_word{E_OPTIONS[i].index(word)}", True))
+                    await pause()
+
+            await s.open("F")
+            await s.change("Enter your name", name)
+            edits = {}
+            rows = [w for w in F_WORDS if w != F_EXAMPLE]
+            answers = sample_answers("F", seed)
+            for row, word in enumerate(rows):
+                for column, value in zip(("Voicing", "Place", "Manner"), answers[word]):
+                    edits.setdefault(str(row), {})[column] = value
+                    grid = {"edited_rows": edits, "added_rows": [], "deleted_rows": []}
+                    record("F edit", await s.change("f_table", json.dumps(grid)))
+                    await pause()
+            record("F check", await s.click("Check My Work"))
+
+            for ex, submit, keys, picks in (
+                ("K", "check_button", [f"radio_{w}" for w in K_WORDS],
+                 sample_answers("K", seed).values()),
+                ("L", "check_button_L", [f"L_{q}" for q in L_OPTIONS],
+                 sample_answers("L", seed).values()),
+            ):
+                await s.open(ex)
+                await s.change("Enter your name", name)
+                # Radios sit in a form: picks are sent with the submit. A radio's
+                # value on the wire is its option label.
+                for key, pick in zip(keys, picks):
+                    s.set(key, str(pick))
+                    await pause()
+                record(f"{ex} check", await s.click(submit))
+                record(f"{ex} pdf", await s.wait_for_download(ex))
+                s.fetch("Download PDF")
+                record(f"{ex} export", await s.click("Download PDF"))
+        if s.errors:
+            raise RuntimeError(f"{s.errors} script error(s), first: {s.first_error}")
+
+
+async def run_level(port: int, pid: int, sessions: int, rounds: int, think: float, ramp: float):
+    samples = defaultdict(list)
+
+    def record(action, seconds):
+        samples[action].append(seconds)
+
+    async def staggered(i):
+        await asyncio.sleep(ramp * i / sessions)
+        return await student(port, i, rounds, think, record)
+
+    with Monitor(pid) as monitor:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(staggered(i) for i in range(sessions)),
+                                       return_exceptions=True)
+        wall = time.perf_counter() - start
+    failed = [r for r in results if isinstance(r, BaseException)]
+    return {
+        "sessions": sessions,
+        "wall_s": wall,
+        "failed_sessions": len(failed),
+        "first_failure": repr(failed[0]) if failed else None,
+        "cpu_percent": monitor.cpu_percent,
+        "peak_rss_mb": monitor.peak_rss / 2 ** 20,
+        "reruns": _percentiles([x for a, xs in samples.items() if not a.endswith("pdf") for x in xs]),
+        "pdf_wait": _percentiles(samples["K pdf"] + samples["L pdf"]),
+        "actions": {a: _percentiles(samples[a]) for a in ACTIONS if samples[a]},
+    }
+
+
+def _percentiles(samples) -> dict:
+    samples = sorted(samples)
+    if not samples:
+        return {"n": 0}
+
+    def rank(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+    return {"n": len(samples), "p50_s": rank(0.50), "p95_s": rank(0.95),
+            "p99_s": rank(0.99), "max_s": samples[-1]}
+
+
+def _ms(summary, field):
+    return f"{summary[field] * 1000:7.1f}" if summary.get("n") else "      -"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", default="1,5,10,20",
+                        help="comma-separated concurrent session counts")
+    parser.add_argument("--rounds", type=int, default=1, help="walks through the pages per session")
+    parser.add_argument("--think", type=float, default=0.5,
+                        help="mean seconds a student pauses between inputs (0 = flat out)")
+    parser.add_argument("--ramp", type=float, default=2.0,
+                        help="seconds over which a level's sessions connect")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print each action's latency")
+    parser.add_argument("-o", "--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    server = start_server(port)
+    results = {"meta": _metadata(), "levels": []}
+    try:
+        print(f"{'N':>4} {'reruns':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} "
+              f"{'pdf p95':>7} {'CPU %':>6} {'RSS MB':>7}  failed")
+        for n in (int(x) for x in args.sessions.split(",")):
+            level = asyncio.run(run_level(port, server.pid, n, args.rounds, args.think, args.ramp))
+            results["levels"].append(level)
+            print(f"{n:>4} {level['reruns']['n']:>7} {_ms(level['reruns'], 'p50_s')} "
+                  f"{_ms(level['reruns'], 'p95_s')} {_ms(level['reruns'], 'p99_s')} "
+                  f"{_ms(level['pdf_wait'], 'p95_s')} {level['cpu_percent']:6.0f} "
+                  f"{level['peak_rss_mb']:7.0f}  {level['failed_sessions']}"
+                  + (f" ({level['first_failure']})" if level["first_failure"] else ""))
+            if args.verbose:
+                for action, summary in level["actions"].items():
+                    print(f"     {action:<9} n={summary['n']:<5} p50 {_ms(summary, 'p50_s')} "
+                          f"p95 {_ms(summary, 'p95_s')} p99 {_ms(summary, 'p99_s')} ms")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"wrote {args.output}", file=sys.stderr)
+    failed = any(level["failed_sessions"] for level in results["levels"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())